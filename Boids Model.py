@@ -1,181 +1,623 @@
 import tkinter as tk
-import math
+import argparse
+import multiprocessing as mp
+import os
 import random
+import threading
 import time
+from multiprocessing import shared_memory
+import numpy as np
 
-class Boid:
-    def __init__(self, canvas, width, height):
-        self.canvas = canvas
-        self.width = width
-        self.height = height
-        
-        # 随机位置和速度
-        self.x = random.randint(0, width)
-        self.y = random.randint(0, height)
-        angle = random.uniform(0, 2 * math.pi)
-        self.vx = math.cos(angle) * 2
-        self.vy = math.sin(angle) * 2
-        
-        # 绘制鸟
-        size = 8
-        self.triangle = self.canvas.create_polygon(
-            self.x, self.y,
-            self.x - size, self.y + size,
-            self.x - size, self.y - size,
-            fill=self.get_random_color()
-        )
+# 规则参数（沿用原 Boid 各规则中的常量）
+SEPARATION_RADIUS = 50  # 分离半径
+ALIGNMENT_RADIUS = 100  # 对齐半径
+COHESION_RADIUS = 80  # 聚集半径
+NEIGHBOR_RADIUS = max(SEPARATION_RADIUS, ALIGNMENT_RADIUS, COHESION_RADIUS)
+RULE_WEIGHT = 0.1  # 三条规则的权重
+MAX_SPEED = 5  # 最大速度
+BOUNDARY_MARGIN = 50  # 距离边界多远开始转向
+TURN_FACTOR = 0.2  # 转向力度
+BOID_SIZE = 8  # 三角形大小
+BOID_COLORS = ("#47B3FF", "#32CD9A", "#FF66CC", "#FFCC33")
+
+def neighbor_pairs(qx, qy, px, py, radius, max_pairs=2000000):
+    """网格分桶近邻搜索
     
-    def get_random_color(self):
-        colors = ["#47B3FF", "#32CD9A", "#FF66CC", "#FFCC33"]
-        return random.choice(colors)
+    把候选点按边长为 radius 的网格分桶，每个查询点只检查周围 3x3 个桶。
+    逐块产出 (qi, pj, dx, dy, dist)：查询点下标、候选点下标、
+    查询点减候选点的坐标差及距离，只保留 0 < dist < radius 的点对。
+    每块的候选点对数不超过 max_pairs，避免大鸟群时内存暴涨。
+    """
+    nq = len(qx)
+    if nq == 0 or len(px) == 0:
+        return
     
-    def update(self, boids):
-        # 添加简单规则
-        separation = self.apply_separation(boids)
-        alignment = self.apply_alignment(boids)
-        cohesion = self.apply_cohesion(boids)
-        boundary = self.apply_boundary()  # 新增边界转向
-        
-        # 更新速度（包含边界转向）
-        self.vx += (separation[0] + alignment[0] + cohesion[0] + boundary[0])
-        self.vy += (separation[1] + alignment[1] + cohesion[1] + boundary[1])
-        
-        # 限制最大速度
-        speed = math.sqrt(self.vx**2 + self.vy**2)
-        if speed > 5:
-            self.vx = (self.vx / speed) * 5
-            self.vy = (self.vy / speed) * 5
-        
-        # 更新位置
-        self.x += self.vx
-        self.y += self.vy
+    pcx = np.floor(px / radius).astype(np.int64)
+    pcy = np.floor(py / radius).astype(np.int64)
+    qcx = np.floor(qx / radius).astype(np.int64)
+    qcy = np.floor(qy / radius).astype(np.int64)
+    
+    # 把二维桶坐标编码成一维键，邻桶偏移后仍保持非负
+    min_cx = min(pcx.min(), qcx.min()) - 1
+    min_cy = min(pcy.min(), qcy.min()) - 1
+    span = max(pcy.max(), qcy.max()) - min_cy + 2
+    pkey = (pcx - min_cx) * span + (pcy - min_cy)
+    order = np.argsort(pkey, kind='stable')
+    sorted_keys = pkey[order]
+    
+    # 每个查询点在 9 个邻桶中对应的候选区间 [lo, hi)
+    lo = np.empty((9, nq), dtype=np.int64)
+    hi = np.empty((9, nq), dtype=np.int64)
+    k = 0
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            qkey = (qcx + ox - min_cx) * span + (qcy + oy - min_cy)
+            lo[k] = np.searchsorted(sorted_keys, qkey, side='left')
+            hi[k] = np.searchsorted(sorted_keys, qkey, side='right')
+            k += 1
+    counts = hi - lo
+    cumulative = np.cumsum(counts.sum(axis=0))
+    
+    start = 0
+    while start < nq:
+        base = cumulative[start - 1] if start else 0
+        end = max(int(np.searchsorted(cumulative, base + max_pairs, side='right')), start + 1)
         
-        # 边界处理：转向而不是环形边界
-        self.check_boundaries()
+        c = counts[:, start:end].ravel()
+        total = int(c.sum())
+        if total:
+            qi = np.repeat(np.tile(np.arange(start, end), 9), c)
+            first = np.repeat(np.cumsum(c) - c, c)
+            pj = order[np.repeat(lo[:, start:end].ravel(), c) + np.arange(total) - first]
+            dx = qx[qi] - px[pj]
+            dy = qy[qi] - py[pj]
+            dist = np.hypot(dx, dy)
+            mask = (dist > 0) & (dist < radius)
+            yield qi[mask], pj[mask], dx[mask], dy[mask], dist[mask]
+        start = end
+
+def flock_step(x, y, vx, vy, width, height, targets=None, pool=None):
+    """按分离、对齐、聚集和边界规则把鸟群推进一步
+    
+    targets 为需要更新的鸟的下标，pool 为可作为邻居的鸟的下标，默认都是全部。
+    所有鸟基于同一时刻的状态同步更新，返回 targets 对应的新 (x, y, vx, vy)。
+    """
+    if targets is None:
+        targets = np.arange(len(x))
+    if pool is None:
+        pool = np.arange(len(x))
+    
+    tx, ty, tvx, tvy = x[targets], y[targets], vx[targets], vy[targets]
+    px, py, pvx, pvy = x[pool], y[pool], vx[pool], vy[pool]
+    n = len(targets)
+    
+    sep_x = np.zeros(n)
+    sep_y = np.zeros(n)
+    ali_vx = np.zeros(n)
+    ali_vy = np.zeros(n)
+    ali_n = np.zeros(n)
+    coh_x = np.zeros(n)
+    coh_y = np.zeros(n)
+    coh_n = np.zeros(n)
+    
+    for qi, pj, dx, dy, dist in neighbor_pairs(tx, ty, px, py, NEIGHBOR_RADIUS):
+        # 分离：远离过近的鸟
+        near = dist < SEPARATION_RADIUS
+        sep_x += np.bincount(qi[near], weights=dx[near] / dist[near], minlength=n)
+        sep_y += np.bincount(qi[near], weights=dy[near] / dist[near], minlength=n)
         
-        # 更新画布上的形状
-        points = self.calculate_triangle_points()
-        self.canvas.coords(self.triangle, points)
-    
-    def apply_boundary(self):
-        """新增：在边界附近施加转向力"""
-        margin = 50  # 距离边界多远开始转向
-        turn_factor = 0.2  # 转向力度
+        # 对齐：匹配附近鸟的速度
+        near = dist < ALIGNMENT_RADIUS
+        ali_vx += np.bincount(qi[near], weights=pvx[pj[near]], minlength=n)
+        ali_vy += np.bincount(qi[near], weights=pvy[pj[near]], minlength=n)
+        ali_n += np.bincount(qi[near], minlength=n)
         
-        boundary_x, boundary_y = 0, 0
+        # 聚集：向附近鸟的中心移动
+        near = dist < COHESION_RADIUS
+        coh_x += np.bincount(qi[near], weights=px[pj[near]], minlength=n)
+        coh_y += np.bincount(qi[near], weights=py[pj[near]], minlength=n)
+        coh_n += np.bincount(qi[near], minlength=n)
+    
+    ax = sep_x * RULE_WEIGHT
+    ay = sep_y * RULE_WEIGHT
+    
+    has = ali_n > 0
+    ax[has] += (ali_vx[has] / ali_n[has] - tvx[has]) * RULE_WEIGHT
+    ay[has] += (ali_vy[has] / ali_n[has] - tvy[has]) * RULE_WEIGHT
+    
+    has = np.flatnonzero(coh_n > 0)
+    cdx = coh_x[has] / coh_n[has] - tx[has]
+    cdy = coh_y[has] / coh_n[has] - ty[has]
+    cdist = np.hypot(cdx, cdy)
+    ok = cdist > 0
+    ax[has[ok]] += cdx[ok] / cdist[ok] * RULE_WEIGHT
+    ay[has[ok]] += cdy[ok] / cdist[ok] * RULE_WEIGHT
+    
+    # 在边界附近施加转向力
+    ax += TURN_FACTOR * ((tx < BOUNDARY_MARGIN).astype(float) - (tx > width - BOUNDARY_MARGIN))
+    ay += TURN_FACTOR * ((ty < BOUNDARY_MARGIN).astype(float) - (ty > height - BOUNDARY_MARGIN))
+    
+    # 更新速度并限制最大速度
+    new_vx = tvx + ax
+    new_vy = tvy + ay
+    speed = np.hypot(new_vx, new_vy)
+    fast = speed > MAX_SPEED
+    new_vx[fast] = new_vx[fast] / speed[fast] * MAX_SPEED
+    new_vy[fast] = new_vy[fast] / speed[fast] * MAX_SPEED
+    
+    # 更新位置；飞出边界时推回并反弹减速
+    new_x = tx + new_vx
+    new_y = ty + new_vy
+    for pos, vel, limit in ((new_x, new_vx, width), (new_y, new_vy, height)):
+        low = pos < 0
+        pos[low] = 0
+        vel[low] = np.abs(vel[low]) * 0.5
+        high = pos > limit
+        pos[high] = limit
+        vel[high] = -np.abs(vel[high]) * 0.5
+    
+    return new_x, new_y, new_vx, new_vy
+
+def flock_metrics(x, y, vx, vy, neighbor_radius=NEIGHBOR_RADIUS, cluster_radius=COHESION_RADIUS):
+    """计算鸟群指标：(极化度, 平均最近邻距离, 群簇数)
+    
+    极化度为单位速度向量均值的模长（1 表示完全同向）。
+    最近邻只在 neighbor_radius 内搜索，孤立的鸟按 neighbor_radius 计。
+    距离小于 cluster_radius 的鸟视为相连，群簇数为连通分量数。
+    """
+    n = len(x)
+    if n == 0:
+        return 0.0, 0.0, 0
+    
+    speed = np.hypot(vx, vy)
+    moving = speed > 0
+    polarization = np.hypot((vx[moving] / speed[moving]).sum(),
+                            (vy[moving] / speed[moving]).sum()) / n
+    
+    nearest = np.full(n, float(neighbor_radius))
+    link_i = []
+    link_j = []
+    for qi, pj, dx, dy, dist in neighbor_pairs(x, y, x, y, neighbor_radius):
+        np.minimum.at(nearest, qi, dist)
+        close = dist < cluster_radius
+        link_i.append(qi[close])
+        link_j.append(pj[close])
+    
+    # 标签传播 + 指针跳跃求连通分量（点对是对称的，只需单向传播）
+    labels = np.arange(n)
+    if link_i:
+        i = np.concatenate(link_i)
+        j = np.concatenate(link_j)
+        while True:
+            new_labels = labels.copy()
+            np.minimum.at(new_labels, i, labels[j])
+            new_labels = new_labels[new_labels]
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+    clusters = len(np.unique(labels))
+    
+    return float(polarization), float(nearest.mean()), clusters
+
+def random_boids(rng, n, width, height):
+    """生成 n 只随机位置、速度大小为 2 的随机方向的鸟，返回形状为 (4, n) 的数组"""
+    x = rng.integers(0, width, size=n, endpoint=True).astype(float)
+    y = rng.integers(0, height, size=n, endpoint=True).astype(float)
+    angle = rng.uniform(0, 2 * np.pi, size=n)
+    return np.stack((x, y, np.cos(angle) * 2, np.sin(angle) * 2))
+
+def triangle_points(x, y, vx, vy, size=BOID_SIZE):
+    """计算每只鸟三角形的三个顶点，返回形状为 (n, 6) 的数组"""
+    angle = np.arctan2(vy, vx)
+    return np.column_stack((
+        x + size * np.cos(angle), y + size * np.sin(angle),
+        x - size / 3 * np.cos(angle + 2.5), y - size / 3 * np.sin(angle + 2.5),
+        x - size / 3 * np.cos(angle - 2.5), y - size / 3 * np.sin(angle - 2.5),
+    ))
+
+class FlockModel:
+    """与显示无关的鸟群模型
+    
+    全部鸟的位置和速度存放在按容量预先分配的 (4, capacity) 数组中，
+    前 count 个槽位为活动的鸟；增删鸟只移动活动计数，容量不足时按倍数扩容。
+    step(n) 批量推进 n 步，每推进一步依次调用订阅者 callback(model)，
+    界面和指标记录器都通过订阅获得更新。
+    """
+    def __init__(self, width, height, num_boids=30, seed=None, capacity=None):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
         
-        # 左边界
-        if self.x < margin:
-            boundary_x += turn_factor
-        # 右边界
-        if self.x > self.width - margin:
-            boundary_x -= turn_factor
-        # 上边界
-        if self.y < margin:
-            boundary_y += turn_factor
-        # 下边界
-        if self.y > self.height - margin:
-            boundary_y -= turn_factor
+        self.capacity = capacity or max(num_boids, 1024)
+        self._state = np.empty((4, self.capacity))
+        self._count = 0
+        self.steps = 0  # 已推进的步数
+        self.subscribers = []
         
-        return boundary_x, boundary_y
-    
-    def check_boundaries(self):
-        """确保鸟不会飞出边界（转向边界）"""
-        # 如果飞出边界，将其推回并反转速度方向
-        if self.x < 0:
-            self.x = 0
-            self.vx = abs(self.vx) * 0.5  # 反弹并减速
-        elif self.x > self.width:
-            self.x = self.width
-            self.vx = -abs(self.vx) * 0.5  # 反弹并减速
+        self.add_boids(num_boids)
+    
+    @property
+    def count(self):
+        return self._count
+    
+    @property
+    def x(self):
+        return self._state[0, :self._count]
+    
+    @property
+    def y(self):
+        return self._state[1, :self._count]
+    
+    @property
+    def vx(self):
+        return self._state[2, :self._count]
+    
+    @property
+    def vy(self):
+        return self._state[3, :self._count]
+    
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+    
+    def add_boids(self, n):
+        count = self._count
+        if count + n > self.capacity:
+            self.capacity = max(count + n, 2 * self.capacity)
+            state = np.empty((4, self.capacity))
+            state[:, :count] = self._state[:, :count]
+            self._state = state
+        self._state[:, count:count + n] = random_boids(self.rng, n, self.width, self.height)
+        self._count = count + n
+    
+    def remove_boids(self, n):
+        self._count = max(0, self._count - n)
+    
+    def step(self, n=1):
+        for _ in range(n):
+            count = self._count
+            self._state[:, :count] = flock_step(
+                self.x, self.y, self.vx, self.vy, self.width, self.height)
+            self.steps += 1
+            for callback in self.subscribers:
+                callback(self)
+    
+    def metrics(self):
+        return flock_metrics(self.x, self.y, self.vx, self.vy)
+    
+    def close(self):
+        pass
+
+def _tile_grid(workers, width, height):
+    """把 workers 分解为 列数 × 行数，使每个块尽量接近正方形"""
+    best = None
+    for rows in range(1, workers + 1):
+        if workers % rows:
+            continue
+        cols = workers // rows
+        skew = abs(np.log((width / cols) / (height / rows)))
+        if best is None or skew < best[0]:
+            best = (skew, cols, rows)
+    return best[1], best[2]
+
+def _tile_worker(shm_name, capacity, control, barrier, bounds, width, height):
+    """工作进程：每步推进落在本块内的鸟
+    
+    从共享内存的当前缓冲读取本块的鸟及块外 NEIGHBOR_RADIUS 内的光环鸟，
+    把本块鸟的新状态写入另一个缓冲。
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    state = np.ndarray((2, 4, capacity), dtype=np.float64, buffer=shm.buf)
+    x0, x1, y0, y1 = bounds
+    try:
+        while True:
+            barrier.wait()  # 等待主进程发出本步开始信号
+            if control[2]:
+                break
+            count, current = control[0], control[1]
+            x, y, vx, vy = state[current, :, :count]
             
-        if self.y < 0:
-            self.y = 0
-            self.vy = abs(self.vy) * 0.5  # 反弹并减速
-        elif self.y > self.height:
-            self.y = self.height
-            self.vy = -abs(self.vy) * 0.5  # 反弹并减速
-    
-    def apply_separation(self, boids):
-        # 避免与附近的鸟太近
-        steer_x, steer_y = 0, 0
-        for other in boids:
-            if other != self:
-                dx = self.x - other.x
-                dy = self.y - other.y
-                distance = math.sqrt(dx**2 + dy**2)
-                
-                if 0 < distance < 50:  # 分离半径
-                    steer_x += dx / distance
-                    steer_y += dy / distance
-        return steer_x * 0.1, steer_y * 0.1
-    
-    def apply_alignment(self, boids):
-        # 与附近鸟的速度匹配
-        avg_vx, avg_vy = 0, 0
-        count = 0
-        
-        for other in boids:
-            if other != self:
-                dx = self.x - other.x
-                dy = self.y - other.y
-                distance = math.sqrt(dx**2 + dy**2)
-                
-                if 0 < distance < 100:  # 对齐半径
-                    avg_vx += other.vx
-                    avg_vy += other.vy
-                    count += 1
-        
-        if count > 0:
-            avg_vx /= count
-            avg_vy /= count
-            return (avg_vx - self.vx) * 0.1, (avg_vy - self.vy) * 0.1
-        return 0, 0
-    
-    def apply_cohesion(self, boids):
-        # 向附近鸟的中心移动
-        center_x, center_y = 0, 0
-        count = 0
+            owned = np.flatnonzero((x >= x0) & (x < x1) & (y >= y0) & (y < y1))
+            if len(owned):
+                pool = np.flatnonzero((x >= x0 - NEIGHBOR_RADIUS) & (x < x1 + NEIGHBOR_RADIUS) &
+                                      (y >= y0 - NEIGHBOR_RADIUS) & (y < y1 + NEIGHBOR_RADIUS))
+                out = state[1 - current]
+                out[0, owned], out[1, owned], out[2, owned], out[3, owned] = flock_step(
+                    x, y, vx, vy, width, height, targets=owned, pool=pool)
+            
+            barrier.wait()  # 本块完成
+    except BaseException:
+        barrier.abort()  # 让主进程立即得知失败而不是一直等待
+        raise
+    finally:
+        del state
+        shm.close()
+
+class ParallelFlockModel:
+    """按空间分块、多进程推进的鸟群模型，接口与 FlockModel 相同
+    
+    世界被划分为若干矩形块，每块由一个工作进程负责。全部状态放在共享内存的
+    两个缓冲中：每步各进程读取当前缓冲，把本块鸟的新状态写入另一个缓冲，
+    块之间通过共享内存交换边界光环中的鸟；每只鸟只属于一个块，写入互不冲突。
+    两步之间主进程直接读取当前缓冲用于绘制和统计。
+    共享内存按 capacity 预先分配，容量不足时在两步之间按倍数扩容并重启工作进程。
+    """
+    def __init__(self, width, height, num_boids=30, seed=None, workers=None, capacity=None):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = capacity or max(2 * num_boids, 1024)
+        self.steps = 0
+        self.subscribers = []
         
-        for other in boids:
-            if other != self:
-                dx = self.x - other.x
-                dy = self.y - other.y
-                distance = math.sqrt(dx**2 + dy**2)
-                
-                if 0 < distance < 80:  # 聚集半径
-                    center_x += other.x
-                    center_y += other.y
-                    count += 1
+        self._control = mp.RawArray('q', 3)  # [鸟数, 当前缓冲, 停止标志]
         
-        if count > 0:
-            center_x /= count
-            center_y /= count
-            dx = center_x - self.x
-            dy = center_y - self.y
-            dist = math.sqrt(dx**2 + dy**2)
-            if dist > 0:
-                return (dx / dist) * 0.1, (dy / dist) * 0.1
-        return 0, 0
-    
-    def calculate_triangle_points(self):
-        # 计算三角形顶点
-        angle = math.atan2(self.vy, self.vx)
-        size = 8
+        # 外侧块的边界延伸到无穷远，飞到世界边缘上的鸟也有归属
+        cols, rows = _tile_grid(self.workers, width, height)
+        x_edges = [i * width / cols for i in range(cols + 1)]
+        y_edges = [j * height / rows for j in range(rows + 1)]
+        x_edges[0], x_edges[-1] = -np.inf, np.inf
+        y_edges[0], y_edges[-1] = -np.inf, np.inf
+        self._tiles = [(x_edges[i], x_edges[i + 1], y_edges[j], y_edges[j + 1])
+                       for i in range(cols) for j in range(rows)]
         
-        tip_x = self.x + size * math.cos(angle)
-        tip_y = self.y + size * math.sin(angle)
+        self._allocate(self.capacity)
+        self._start_workers()
+        self.add_boids(num_boids)
+    
+    def _allocate(self, capacity):
+        """按容量分配共享内存中的两个状态缓冲"""
+        self.capacity = capacity
+        self._shm = shared_memory.SharedMemory(create=True, size=2 * 4 * capacity * 8)
+        self._state = np.ndarray((2, 4, capacity), dtype=np.float64, buffer=self._shm.buf)
+    
+    def _release(self):
+        self._state = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+    
+    def _start_workers(self):
+        self._control[2] = 0
+        self._barrier = mp.Barrier(len(self._tiles) + 1)
+        self._processes = []
+        for bounds in self._tiles:
+            process = mp.Process(
+                target=_tile_worker, daemon=True,
+                args=(self._shm.name, self.capacity, self._control, self._barrier,
+                      bounds, self.width, self.height))
+            process.start()
+            self._processes.append(process)
+    
+    def _stop_workers(self):
+        self._control[2] = 1
+        try:
+            self._barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+    
+    def _grow(self, capacity):
+        """换用更大的共享内存：停下工作进程，复制当前状态后以新容量重启"""
+        self._stop_workers()
+        count, current = self._control[0], self._control[1]
+        old = self._state[current, :, :count].copy()
+        self._release()
+        self._allocate(capacity)
+        self._state[current, :, :count] = old
+        self._start_workers()
+    
+    def _current(self):
+        return self._state[self._control[1], :, :self._control[0]]
+    
+    @property
+    def count(self):
+        return self._control[0]
+    
+    @property
+    def x(self):
+        return self._current()[0]
+    
+    @property
+    def y(self):
+        return self._current()[1]
+    
+    @property
+    def vx(self):
+        return self._current()[2]
+    
+    @property
+    def vy(self):
+        return self._current()[3]
+    
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+    
+    def add_boids(self, n):
+        """在两步之间写入新鸟，容量不足时先扩容"""
+        count = self._control[0]
+        if n <= 0:
+            return
+        if count + n > self.capacity:
+            self._grow(max(count + n, 2 * self.capacity))
+        self._state[self._control[1], :, count:count + n] = random_boids(
+            self.rng, n, self.width, self.height)
+        self._control[0] = count + n
+    
+    def remove_boids(self, n):
+        self._control[0] = max(0, self._control[0] - n)
+    
+    def step(self, n=1):
+        for _ in range(n):
+            self._barrier.wait()  # 各块开始计算
+            self._barrier.wait()  # 各块写完另一个缓冲
+            self._control[1] = 1 - self._control[1]
+            self.steps += 1
+            for callback in self.subscribers:
+                callback(self)
+    
+    def metrics(self):
+        return flock_metrics(self.x, self.y, self.vx, self.vy)
+    
+    def close(self):
+        """通知工作进程退出并释放共享内存"""
+        if self._shm is None:
+            return
+        self._stop_workers()
+        self._release()
+
+class MetricsRecorder:
+    """把每步的鸟群指标按列记录到 .npz 文件
+    
+    作为 FlockModel 的订阅者使用，每 every 步记录一次，
+    每记录 flush_every 条就整体重写一次文件，长时间实验中途中断也不会丢失全部数据。
+    """
+    COLUMNS = ("step", "polarization", "mean_nn_distance", "clusters")
+    
+    def __init__(self, filename, every=1, flush_every=1000):
+        if every < 1:
+            raise ValueError(f"every 必须为正整数（每多少步记录一次），当前为 {every}")
+        self.filename = filename
+        self.every = every
+        self.flush_every = flush_every
+        self.columns = {name: [] for name in self.COLUMNS}
+        self.flushed = 0
+    
+    def __call__(self, model):
+        if model.steps % self.every:
+            return
+        polarization, mean_nn_distance, clusters = model.metrics()
+        self.columns["step"].append(model.steps)
+        self.columns["polarization"].append(polarization)
+        self.columns["mean_nn_distance"].append(mean_nn_distance)
+        self.columns["clusters"].append(clusters)
+        if len(self.columns["step"]) - self.flushed >= self.flush_every:
+            self.flush()
+    
+    def flush(self):
+        arrays = {
+            "step": np.asarray(self.columns["step"], dtype=np.int64),
+            "polarization": np.asarray(self.columns["polarization"], dtype=np.float64),
+            "mean_nn_distance": np.asarray(self.columns["mean_nn_distance"], dtype=np.float64),
+            "clusters": np.asarray(self.columns["clusters"], dtype=np.int64),
+        }
+        # 先写临时文件再替换，避免中断时留下损坏的文件
+        tmp_name = self.filename + ".tmp"
+        with open(tmp_name, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_name, self.filename)
+        self.flushed = len(self.columns["step"])
+    
+    def close(self):
+        self.flush()
+
+class FlockView:
+    """在 Tk 画布上显示 FlockModel，每只鸟对应一个三角形
+    
+    三角形来自一个只增不减的对象池：鸟减少时隐藏多余的三角形，
+    鸟增加时优先重新显示已隐藏的三角形，只有超过历史最大数量时才新建画布对象。
+    """
+    def __init__(self, canvas, model):
+        self.canvas = canvas
+        self.model = model
+        self.triangles = []  # 三角形对象池
+        self.visible = 0  # 当前显示的三角形数量
+        self.dirty = True
+        model.subscribe(self.on_model_step)
+        self.sync_count()
+    
+    def on_model_step(self, model):
+        self.dirty = True
+    
+    def sync_count(self):
+        """让显示的三角形数量与模型中的鸟数一致"""
+        count = self.model.count
+        while len(self.triangles) < count:
+            self.triangles.append(self.canvas.create_polygon(
+                0, 0, 0, 0, 0, 0, fill=random.choice(BOID_COLORS), state='hidden'))
+        for triangle in self.triangles[self.visible:count]:
+            self.canvas.itemconfigure(triangle, state='normal')
+        for triangle in self.triangles[count:self.visible]:
+            self.canvas.itemconfigure(triangle, state='hidden')
+        self.visible = count
+        self.dirty = True
+    
+    def render(self):
+        """把模型的当前状态同步到画布"""
+        if not self.dirty:
+            return
+        model = self.model
+        points = triangle_points(model.x, model.y, model.vx, model.vy)
+        for triangle, coords in zip(self.triangles, points.tolist()):
+            self.canvas.coords(triangle, coords)
+        self.dirty = False
+
+class FrameScheduler:
+    """自适应帧调度器：测量每帧耗时并调整下一帧的延迟以逼近目标帧率
+    
+    负载过高时先跳过绘制（每 draw_interval 帧才绘制一次），
+    仍然超出预算时只保留最小延迟，模拟速率随之自然降低，
+    但每帧之间总会把控制权交还给 Tk 处理事件，界面不会卡死。
+    """
+    def __init__(self, target_fps=50, min_delay=1, max_draw_interval=4, smoothing=0.2):
+        self.frame_budget = 1.0 / target_fps  # 每帧时间预算（秒）
+        self.min_delay = min_delay  # 最小延迟（毫秒），保证事件循环有机会运行
+        self.max_draw_interval = max_draw_interval
+        self.smoothing = smoothing  # 指数平滑系数
         
-        left_x = self.x - size/3 * math.cos(angle + 2.5)
-        left_y = self.y - size/3 * math.sin(angle + 2.5)
+        self.draw_interval = 1  # 每多少帧绘制一次
+        self.frame_index = 0
+        self.step_time = 0.0  # 平滑后的单帧工作耗时（秒）
+        self.fps = 0.0  # 平滑后的实测帧率
+        self.last_frame_start = None
+        self.frame_start = None
+    
+    def begin_frame(self):
+        """记录一帧开始的时间，并据此更新实测帧率"""
+        now = time.perf_counter()
+        if self.last_frame_start is not None:
+            interval = now - self.last_frame_start
+            if interval > 0:
+                self.fps = self._smooth(self.fps, 1.0 / interval)
+        self.last_frame_start = now
+        self.frame_start = now
+        self.frame_index += 1
+    
+    def should_draw(self):
+        """本帧是否需要绘制"""
+        return self.frame_index % self.draw_interval == 0
+    
+    def end_frame(self):
+        """结束一帧，返回下一帧前应等待的毫秒数"""
+        elapsed = time.perf_counter() - self.frame_start
+        self.step_time = self._smooth(self.step_time, elapsed)
         
-        right_x = self.x - size/3 * math.cos(angle - 2.5)
-        right_y = self.y - size/3 * math.sin(angle - 2.5)
+        # 超出预算时逐级跳过绘制，余量充足时再逐级恢复
+        if self.step_time > self.frame_budget and self.draw_interval < self.max_draw_interval:
+            self.draw_interval += 1
+        elif self.step_time < self.frame_budget * 0.5 and self.draw_interval > 1:
+            self.draw_interval -= 1
         
-        return tip_x, tip_y, left_x, left_y, right_x, right_y
+        delay = (self.frame_budget - elapsed) * 1000
+        return max(self.min_delay, int(delay))
+    
+    def _smooth(self, old, new):
+        if old == 0.0:
+            return new
+        return old + (new - old) * self.smoothing
 
 class BoidSimulation:
-    def __init__(self):
+    def __init__(self, num_boids=30, workers=1):
         self.root = tk.Tk()
         self.root.title("Boids 鸟群模拟 - 使用Tkinter")
         
@@ -244,13 +686,18 @@ class BoidSimulation:
         self.title_label.place(relx=0.5, rely=0.01, anchor='center')
         
         # 初始化鸟群
-        self.boids = []
-        for _ in range(30):
-            self.boids.append(Boid(self.canvas, self.width, self.height))
+        if workers > 1:
+            self.model = ParallelFlockModel(self.width, self.height, num_boids=num_boids, workers=workers)
+        else:
+            self.model = FlockModel(self.width, self.height, num_boids=num_boids)
+        self.view = FlockView(self.canvas, self.model)
+        self.view.render()
         
         # 状态
         self.paused = False
         self.running = True
+        self.scheduler = FrameScheduler(target_fps=50)
+        self.last_stats_time = 0.0
         
         # 开始模拟
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -258,15 +705,15 @@ class BoidSimulation:
         self.root.mainloop()
     
     def add_boids(self):
-        for _ in range(5):
-            self.boids.append(Boid(self.canvas, self.width, self.height))
+        self.model.add_boids(5)
+        self.view.sync_count()
+        self.view.render()
         self.update_boid_count()
     
     def remove_boids(self):
-        for _ in range(5):
-            if self.boids:
-                boid = self.boids.pop()
-                self.canvas.delete(boid.triangle)
+        self.model.remove_boids(5)
+        self.view.sync_count()
+        self.view.render()
         self.update_boid_count()
     
     def toggle_pause(self):
@@ -274,20 +721,82 @@ class BoidSimulation:
         self.title_label.config(text="鸟群行为模拟 - 已暂停" if self.paused else "鸟群行为模拟 - Boids 模型")
     
     def update_boid_count(self):
-        """更新鸟群数量显示"""
-        self.boid_count.config(text=f"鸟群数量: {len(self.boids)}")
+        """更新鸟群数量及帧率、单步耗时显示"""
+        scheduler = self.scheduler
+        text = (f"鸟群数量: {self.model.count}    "
+                f"FPS: {scheduler.fps:.1f}    "
+                f"单步耗时: {scheduler.step_time * 1000:.1f} ms")
+        if scheduler.draw_interval > 1:
+            text += f"    (每{scheduler.draw_interval}帧绘制一次)"
+        self.boid_count.config(text=text)
     
     def update(self):
-        if not self.paused and self.running:
-            for boid in self.boids:
-                boid.update(self.boids)
+        if not self.running:
+            return
         
-        self.root.after(20, self.update)  # 每20ms更新一次
+        self.scheduler.begin_frame()
+        if not self.paused:
+            self.model.step()
+            if self.scheduler.should_draw():
+                self.view.render()
+        delay = self.scheduler.end_frame()
+        
+        # 统计信息每0.5秒刷新一次即可
+        now = time.perf_counter()
+        if now - self.last_stats_time >= 0.5:
+            self.last_stats_time = now
+            self.update_boid_count()
+        
+        self.root.after(delay, self.update)  # 根据本帧耗时自适应调整延迟
     
     def on_close(self):
         self.running = False
+        self.model.close()
         self.root.destroy()
 
+def run_headless(steps, num_boids=30, width=1920, height=1080,
+                 metrics_file="boids_metrics.npz", metrics_every=1, seed=None, report_every=1000,
+                 workers=1):
+    """无界面运行鸟群模拟，并把每步指标写入列式文件；workers > 1 时按空间分块多进程推进"""
+    if workers > 1:
+        model = ParallelFlockModel(width, height, num_boids=num_boids, seed=seed, workers=workers)
+    else:
+        model = FlockModel(width, height, num_boids=num_boids, seed=seed)
+    recorder = MetricsRecorder(metrics_file, every=metrics_every)
+    model.subscribe(recorder)
+    
+    start_time = time.perf_counter()
+    try:
+        while model.steps < steps:
+            model.step(min(report_every, steps - model.steps))
+            elapsed = time.perf_counter() - start_time
+            print(f"Step {model.steps}/{steps}  "
+                  f"{model.steps / elapsed:.1f} steps/sec")
+    except KeyboardInterrupt:
+        print(f"\nInterrupted at step {model.steps}")
+    finally:
+        recorder.close()
+        model.close()
+        print(f"Metrics written to {metrics_file}")
+    
+    return model
+
 # 启动模拟
 if __name__ == "__main__":
-    simulation = BoidSimulation()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Boids 鸟群模拟")
+    parser.add_argument("--headless", action="store_true", help="无界面运行并记录指标")
+    parser.add_argument("--steps", type=int, default=100000, help="无界面运行的步数")
+    parser.add_argument("--boids", type=int, default=30, help="鸟的数量")
+    parser.add_argument("--width", type=int, default=1920, help="无界面运行时的世界宽度")
+    parser.add_argument("--height", type=int, default=1080, help="无界面运行时的世界高度")
+    parser.add_argument("--metrics", default="boids_metrics.npz", help="指标输出文件")
+    parser.add_argument("--metrics-every", type=int, default=1, help="每多少步记录一次指标")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--workers", type=int, default=1, help="工作进程数，大于1时按空间分块并行")
+    args = parser.parse_args()
+    
+    if args.headless:
+        run_headless(args.steps, args.boids, args.width, args.height,
+                     args.metrics, args.metrics_every, args.seed, workers=args.workers)
+    else:
+        simulation = BoidSimulation(args.boids, args.workers)
\ No newline at end of file
@@ -4,11 +4,78 @@ import random
 import matplotlib.pyplot as plt
 import numpy as np
 import sys
+import os
+import mmap
+import struct
+import json
+import threading
+import platform
+import datetime
+import bisect
+import signal
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+SIEVE_SEGMENT_SIZE = 1 << 20  # 每段覆盖的整数个数；只为奇数分配标记，约占 512KB，可放进 L2 缓存
+
+def small_primes(limit):
+    """简单埃拉托斯特尼筛，返回不超过 limit 的全部素数（NumPy 数组）"""
+    if limit < 2:
+        return np.empty(0, dtype=np.int64)
+    flags = np.ones(limit + 1, dtype=bool)
+    flags[:2] = False
+    flags[4::2] = False
+    for p in range(3, math.isqrt(limit) + 1, 2):
+        if flags[p]:
+            flags[p * p::2 * p] = False
+    return np.flatnonzero(flags)
+
+def sieve_segment(lo, hi, base_primes):
+    """
+    筛出半开区间 [lo, hi) 内每个数是否为素数，返回长度为 hi - lo 的布尔数组
+    base_primes 须包含不超过 √(hi-1) 的全部素数；只为奇数分配标记
+    """
+    flags = np.zeros(hi - lo, dtype=bool)
+    first_odd = lo | 1
+    if first_odd < hi:
+        odd = np.ones((hi - first_odd + 1) // 2, dtype=bool)  # odd[i] 对应 first_odd + 2i
+        for p in base_primes:
+            p = int(p)
+            if p == 2:
+                continue
+            if p * p >= hi:
+                break
+            # 从 p² 与区间内第一个 p 的倍数中较大者开始，且只划掉奇数倍
+            start = max(p * p, (first_odd + p - 1) // p * p)
+            if start % 2 == 0:
+                start += p
+            odd[(start - first_odd) // 2::p] = False
+        flags[first_odd - lo::2] = odd
+    
+    # 1 不是素数，2 是唯一的偶素数
+    if lo <= 1 < hi:
+        flags[1 - lo] = False
+    if lo <= 2 < hi:
+        flags[2 - lo] = True
+    return flags
+
+def segmented_sieve(lo, hi, segment_size=SIEVE_SEGMENT_SIZE):
+    """
+    分段只筛奇数的埃拉托斯特尼筛
+    逐段产出 (seg_lo, flags)，flags[i] 表示 seg_lo + i 是否为素数，各段依次覆盖 [lo, hi]
+    """
+    lo = max(lo, 0)
+    if hi < lo:
+        return
+    base_primes = small_primes(math.isqrt(hi))
+    for seg_lo in range(lo, hi + 1, segment_size):
+        seg_hi = min(seg_lo + segment_size, hi + 1)
+        yield seg_lo, sieve_segment(seg_lo, seg_hi, base_primes)
 
 def is_prime_miller_rabin(n, k=5):
     """
     使用Miller-Rabin算法进行素数测试
-    对于n < 2^64，使用确定的k=12可以保证正确性
+    每次随机选择k个底数，结果是概率性的；需要确定结果请用is_prime_deterministic
     """
     if n < 2:
         return False
@@ -38,6 +105,65 @@ def is_prime_miller_rabin(n, k=5):
             return False
     return True
 
+# 小素数预筛：先与这些素数的乘积求一次gcd，相当于一次完成全部试除
+PREFILTER_PRIMES = tuple(int(p) for p in small_primes(211))
+PREFILTER_PRODUCT = math.prod(PREFILTER_PRIMES)
+PREFILTER_LIMIT = 223 * 223  # 没有不超过211的因子且小于223²的数必为素数
+
+# 确定性Miller-Rabin底数：n 小于阈值时，用对应底数测试的结果是确定的
+MR_DETERMINISTIC_BASES = (
+    (2047, (2,)),
+    (1373653, (2, 3)),
+    (25326001, (2, 3, 5)),
+    (3215031751, (2, 3, 5, 7)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (3825123056546413051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3317044064679887385961981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+)
+
+def _miller_rabin_bases(n):
+    """返回对 n 足以给出确定结果的底数；超出已知范围时沿用最大的一组（结果为概率性的）"""
+    for limit, bases in MR_DETERMINISTIC_BASES:
+        if n < limit:
+            return bases
+    return MR_DETERMINISTIC_BASES[-1][1]
+
+def is_prime_deterministic(n):
+    """
+    确定性Miller-Rabin素数测试
+    先用小素数预筛排除大部分合数，再用固定底数集测试；n < 3.3×10²⁴（覆盖全部64位整数）时结果确定且可复现
+    """
+    if n < 2:
+        return False
+    if n <= PREFILTER_PRIMES[-1]:
+        return n in PREFILTER_PRIMES
+    if math.gcd(n, PREFILTER_PRODUCT) != 1:
+        return False
+    if n < PREFILTER_LIMIT:
+        return True
+    
+    # 将n-1分解为d*2^s
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    
+    for a in _miller_rabin_bases(n):
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
 def is_prime_optimized(n):
     """使用6k±1优化法检查素数"""
     if n <= 1:
@@ -55,6 +181,55 @@ def is_prime_optimized(n):
     
     return True
 
+WHEEL_PRIME_LIMIT = 1 << 20  # 素数表覆盖 √n ≤ 2^20（n 约 1.1e12 以内），首次判断时才筛出
+
+class WheelTrialDivision:
+    """
+    轮式分解试除法（模30或模210）
+    先用小素数表试除（素数表在首次判断时才筛出）；√n超出素数表后，按整圈
+    只试与轮模数互素的候选因子（模30每圈8个，模210每圈48个），
+    候选密度8/30、48/210都低于6k±1的1/3
+    """
+    def __init__(self, modulus=30, prime_limit=WHEEL_PRIME_LIMIT):
+        self.modulus = modulus
+        # 素数表至少越过一整圈，保证逐圈试除从 modulus 之后开始，不会试到因子1
+        self.prime_limit = max(prime_limit, 2 * modulus)
+        self._primes = None
+        
+        # 一圈内与模数互素的余数
+        self.residues = [r for r in range(1, modulus + 1) if math.gcd(r, modulus) == 1]
+    
+    @property
+    def primes(self):
+        if self._primes is None:
+            self._primes = small_primes(self.prime_limit).tolist()
+        return self._primes
+    
+    def is_prime(self, n):
+        if n < 2:
+            return False
+        primes = self.primes
+        for p in primes:
+            if p * p > n:
+                return True
+            if n % p == 0:
+                return n == p
+        
+        # √n 超出素数表，从素数表末尾所在的一圈起逐圈试除；
+        # 一圈内展开为对余数表的循环，免去逐个候选维护间隔下标
+        modulus = self.modulus
+        residues = self.residues
+        base = primes[-1] // modulus * modulus
+        while base * base <= n:
+            for r in residues:
+                if n % (base + r) == 0:
+                    return False
+            base += modulus
+        return True
+
+wheel_30 = WheelTrialDivision(30)
+wheel_210 = WheelTrialDivision(210)
+
 def is_prime_original(n):
     """原始方法检查素数"""
     if n < 2:
@@ -66,66 +241,384 @@ def is_prime_original(n):
             return False
     return True
 
-def compare_methods(max_num=100000):
-    """比较三种素数检查方法的性能"""
-    methods = [
-        ("Original", is_prime_original),
-        ("6k±1 Optimized", is_prime_optimized),
-        ("Miller-Rabin", lambda n: is_prime_miller_rabin(n, k=5))
-    ]
+# ---- 素数计数查询 ----
+class PrimeSegmentCache:
+    """
+    已筛分段的缓存，第i段覆盖 [i*segment_size, (i+1)*segment_size)
+    各段的素数个数一旦算出就永久保存为前缀和索引，段的筛选结果按LRU淘汰，
+    重复的计数和区间查询直接由缓存回答，不必重新筛
+    """
+    def __init__(self, segment_size=SIEVE_SEGMENT_SIZE, max_segments=64):
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self._flags = OrderedDict()  # 段号 -> 布尔数组，按最近使用排序
+        self._prefix = [0]  # _prefix[i] 为前i段的素数总数
+        self._base_primes = np.empty(0, dtype=np.int64)
+        self._base_limit = 1
     
-    # 设置图表
-    plt.figure(figsize=(12, 8))
-    colors = ['blue', 'red', 'green']
+    def _base(self, limit):
+        """返回至少覆盖到limit的基础素数，不够时成倍扩大"""
+        if limit > self._base_limit:
+            self._base_limit = max(limit, 2 * self._base_limit)
+            self._base_primes = small_primes(self._base_limit)
+        return self._base_primes
     
-    results = {}
+    def segment(self, i):
+        """返回第i段的素性标记，命中缓存时不再重新筛"""
+        flags = self._flags.get(i)
+        if flags is not None:
+            self._flags.move_to_end(i)
+            return flags
+        lo = i * self.segment_size
+        hi = lo + self.segment_size
+        flags = sieve_segment(lo, hi, self._base(math.isqrt(hi - 1)))
+        self._flags[i] = flags
+        if len(self._flags) > self.max_segments:
+            self._flags.popitem(last=False)
+        return flags
     
-    for idx, (name, func) in enumerate(methods):
-        print(f"Testing {name} method...")
-        start_time = time.time()
-        time_points = []
-        count_points = []
+    def _extend_prefix(self, segments):
+        """确保前缀和至少覆盖前segments段"""
+        while len(self._prefix) <= segments:
+            i = len(self._prefix) - 1
+            self._prefix.append(self._prefix[-1] + int(self.segment(i).sum()))
+    
+    def prime_pi(self, n):
+        """不超过n的素数个数 π(n)"""
+        if n < 2:
+            return 0
+        i = n // self.segment_size
+        self._extend_prefix(i)
+        return self._prefix[i] + int(self.segment(i)[:n - i * self.segment_size + 1].sum())
+    
+    def nth_prime(self, k):
+        """第k个素数（k从1开始）"""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        while self._prefix[-1] < k:
+            self._extend_prefix(len(self._prefix))
+        # 前缀和单调不减，二分找到第k个素数所在的段
+        i = bisect.bisect_left(self._prefix, k) - 1
+        primes = np.flatnonzero(self.segment(i))
+        return i * self.segment_size + int(primes[k - self._prefix[i] - 1])
+    
+    def primes_in_range(self, a, b):
+        """返回 [a, b] 内的全部素数（NumPy数组）"""
+        a = max(a, 0)
+        if b < a:
+            return np.empty(0, dtype=np.int64)
+        parts = []
+        for i in range(a // self.segment_size, b // self.segment_size + 1):
+            lo = i * self.segment_size
+            first = max(a, lo)
+            flags = self.segment(i)[first - lo:b - lo + 1]
+            parts.append(np.flatnonzero(flags) + first)
+        return np.concatenate(parts)
+
+_default_segment_cache = PrimeSegmentCache()
+
+def prime_pi(n):
+    """不超过n的素数个数，使用模块级分段缓存"""
+    return _default_segment_cache.prime_pi(n)
+
+def nth_prime(k):
+    """第k个素数（k从1开始），使用模块级分段缓存"""
+    return _default_segment_cache.nth_prime(k)
+
+def primes_in_range(a, b):
+    """[a, b] 内的全部素数，使用模块级分段缓存"""
+    return _default_segment_cache.primes_in_range(a, b)
+
+# ---- 向量化批量素性判断 ----
+ARRAY_SIEVE_THRESHOLD = 1 << 20  # 小于该值的数直接查筛表
+_prime_lookup = np.zeros(0, dtype=bool)  # 懒加载的筛表，按需扩大
+
+_U64_1 = np.uint64(1)
+_U64_32 = np.uint64(32)
+_U64_MASK32 = np.uint64(0xFFFFFFFF)
+
+def _prime_lookup_table(limit):
+    """返回覆盖 [0, limit) 的素性查找表，首次用到或不够大时重新筛"""
+    global _prime_lookup
+    if len(_prime_lookup) < limit:
+        _prime_lookup = np.concatenate([flags for _, flags in segmented_sieve(0, limit - 1)])
+    return _prime_lookup
+
+def _mul_full(a, b):
+    """uint64 数组逐元素相乘，返回128位乘积的 (高64位, 低64位)"""
+    a0, a1 = a & _U64_MASK32, a >> _U64_32
+    b0, b1 = b & _U64_MASK32, b >> _U64_32
+    p00, p01, p10, p11 = a0 * b0, a0 * b1, a1 * b0, a1 * b1
+    mid = (p00 >> _U64_32) + (p01 & _U64_MASK32) + (p10 & _U64_MASK32)
+    lo = (p00 & _U64_MASK32) | (mid << _U64_32)
+    hi = p11 + (p01 >> _U64_32) + (p10 >> _U64_32) + (mid >> _U64_32)
+    return hi, lo
+
+def _mont_mul(a, b, n, n_inv):
+    """蒙哥马利乘法：返回 a*b*2⁻⁶⁴ mod n，n 为奇数，n_inv = -n⁻¹ mod 2⁶⁴"""
+    hi, lo = _mul_full(a, b)
+    m = lo * n_inv
+    mh, _ = _mul_full(m, n)
+    # lo + m*n 的低64位必为0，只有 lo 非0时才向高位进1
+    t = hi + mh
+    overflow = t < hi
+    carry = (lo != 0).astype(np.uint64)
+    t = t + carry
+    overflow |= t < carry
+    # 结果小于2n，最多减一次n；2n 可能超过 2⁶⁴，溢出时同样需要减
+    return np.where(overflow | (t >= n), t - n, t)
+
+def _add_mod(a, b, n):
+    s = a + b
+    return np.where((s < a) | (s >= n), s - n, s)
+
+def _miller_rabin_array(n, bases):
+    """
+    对奇数数组 n（每个都大于所有底数）做Miller-Rabin测试，返回布尔数组
+    n < 2³² 时乘积不会超出 uint64，直接相乘取模；否则在蒙哥马利形式下计算
+    """
+    if n.max() < 2**32:
+        one = np.ones_like(n)
         
-        # 测试方法
-        for i in range(1, max_num + 1):
-            func(i)
-            if i % 1000 == 0 or i == max_num:  # 每1000次记录一次
-                elapsed = time.time() - start_time
-                time_points.append(elapsed)
-                count_points.append(i)
+        def mul(a, b, k):
+            return a * b % n[k]
         
-        total_time = time.time() - start_time
-        results[name] = {
-            'time_points': time_points,
-            'count_points': count_points,
-            'total_time': total_time
-        }
+        def to_form(a, k):
+            return a % n[k]
+    else:
+        # 牛顿迭代求 n⁻¹ mod 2⁶⁴：奇数 n 满足 n*n ≡ 1 (mod 8)，每次迭代正确位数翻倍
+        inv = n.copy()
+        for _ in range(5):
+            inv *= np.uint64(2) - n * inv
+        n_inv = np.uint64(0) - inv
+        one = (np.uint64(0) - n) % n  # 2⁶⁴ mod n，即1的蒙哥马利形式
+        r2 = one
+        for _ in range(64):
+            r2 = _add_mod(r2, r2, n)  # 2¹²⁸ mod n
+        
+        def mul(a, b, k):
+            return _mont_mul(a, b, n[k], n_inv[k])
         
-        # 绘制曲线
-        plt.plot(time_points, count_points, color=colors[idx], label=name, linewidth=2)
+        def to_form(a, k):
+            return _mont_mul(a, r2[k], n[k], n_inv[k])
+    minus_one = n - one
+    
+    # 将n-1分解为d*2^s
+    d = n - _U64_1
+    s = np.zeros(len(n), dtype=np.int64)
+    even = (d & _U64_1) == 0
+    while even.any():
+        d[even] >>= _U64_1
+        s[even] += 1
+        even = (d & _U64_1) == 0
+    
+    is_prime = np.ones(len(n), dtype=bool)
+    for a in bases:
+        k = np.flatnonzero(is_prime)  # 只测试仍可能是素数的数
+        if len(k) == 0:
+            break
+        
+        # 从高位到低位的平方-乘法求 a^d
+        base = to_form(np.full(len(k), a, dtype=np.uint64), k)
+        dk = d[k]
+        x = one[k].copy()
+        for bit in range(int(dk.max()).bit_length() - 1, -1, -1):
+            x = mul(x, x, k)
+            use = ((dk >> np.uint64(bit)) & _U64_1).astype(bool)
+            x[use] = mul(x[use], base[use], k[use])
+        
+        passed = (x == one[k]) | (x == minus_one[k])
+        sk = s[k]
+        for r in range(1, int(sk.max())):
+            active = np.flatnonzero(~passed & (r < sk))
+            if len(active) == 0:
+                break
+            x[active] = mul(x[active], x[active], k[active])
+            passed[active] |= x[active] == minus_one[k[active]]
+        is_prime[k[~passed]] = False
+    return is_prime
+
+def is_prime_array(values, sieve_threshold=ARRAY_SIEVE_THRESHOLD):
+    """
+    批量判断整数数组中每个数是否为素数，返回同形状的布尔数组
+    小于sieve_threshold的数直接查筛表；其余先用小素数预筛，
+    再按确定性底数集做向量化Miller-Rabin，适用于全部64位无符号整数
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iu':
+        raise TypeError(f"is_prime_array expects an integer array, got {values.dtype}")
+    flat = values.ravel()
+    result = np.zeros(flat.shape, dtype=bool)
     
-    # 计算性能提升
-    original_time = results["Original"]['total_time']
-    optimized_time = results["6k±1 Optimized"]['total_time']
-    miller_time = results["Miller-Rabin"]['total_time']
+    # 负数都不是素数
+    valid = np.flatnonzero(flat >= 0) if values.dtype.kind == 'i' else np.arange(len(flat))
+    n = flat[valid].astype(np.uint64)
     
-    optimized_speedup = original_time / optimized_time
-    miller_speedup = original_time / miller_time
+    # 查筛表
+    sieve_threshold = max(sieve_threshold, PREFILTER_LIMIT)
+    small = n < sieve_threshold
+    if small.any():
+        table = _prime_lookup_table(min(sieve_threshold, int(n[small].max()) + 1))
+        result[valid[small]] = table[n[small].astype(np.intp)]
     
-    # 设置图表属性
-    plt.xlabel('Time (seconds)')
-    plt.ylabel('Numbers Checked')
-    plt.title(f'Performance Comparison of Prime Checking Methods (Up to {max_num})')
-    plt.legend()
-    plt.grid(True)
+    # 小素数预筛（这些数都大于211，能被小素数整除即为合数）
+    big = np.flatnonzero(~small)
+    for p in PREFILTER_PRIMES:
+        big = big[n[big] % np.uint64(p) != 0]
+    
+    # 按确定性底数集分组测试，2³²以内与以上分开，以便前者走更快的直接取模
+    lower = 0
+    for limit, bases in MR_DETERMINISTIC_BASES:
+        nb = n[big]
+        in_tier = nb >= lower if limit > 2**64 - 1 else (nb >= lower) & (nb < limit)
+        for part in (in_tier & (nb < 2**32), in_tier & (nb >= 2**32)):
+            k = big[part]
+            if len(k):
+                result[valid[k]] = _miller_rabin_array(n[k], bases)
+        if limit > 2**64 - 1:
+            break
+        lower = limit
+    
+    return result.reshape(values.shape)
+
+def _per_number(func, chunk_size=1000):
+    """把逐个数判断的函数包装成与 segmented_sieve 相同的分块接口"""
+    def check_range(lo, hi):
+        for chunk_lo in range(lo, hi + 1, chunk_size):
+            chunk_hi = min(chunk_lo + chunk_size - 1, hi)
+            yield chunk_lo, [func(n) for n in range(chunk_lo, chunk_hi + 1)]
+    return check_range
+
+# 基准测试的数值区间：(名称, 起点, 个数)；small 区间的个数由 max_num 决定
+BENCHMARK_BANDS = (
+    ("small", 1, None),
+    ("1e6", 10**6, 1000),
+    ("1e12", 10**12, 200),
+    ("1e18", 10**18, 200),
+)
+
+def _run_once(check_range, lo, hi):
+    """完整跑一遍区间，只计方法本身的耗时"""
+    start = time.perf_counter_ns()
+    for _ in check_range(lo, hi):
+        pass
+    return time.perf_counter_ns() - start
+
+def benchmark_method(check_range, lo, hi, warmup=1, repeats=5):
+    """先预热warmup轮，再重复repeats轮，返回每轮耗时的统计（纳秒）"""
+    for _ in range(warmup):
+        _run_once(check_range, lo, hi)
+    samples = [_run_once(check_range, lo, hi) for _ in range(repeats)]
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    return {
+        'numbers': hi - lo + 1,
+        'median_ns': float(median),
+        'q1_ns': float(q1),
+        'q3_ns': float(q3),
+        'iqr_ns': float(q3 - q1),
+        'min_ns': min(samples),
+        'max_ns': max(samples),
+        'ns_per_number': float(median) / (hi - lo + 1),
+        'samples_ns': samples
+    }
+
+def compare_methods(max_num=100000, warmup=1, repeats=5, output_json='prime_benchmark.json', selected=None):
+    """
+    比较各种素数检查方法的性能
+    每个方法在每个数值区间上预热后重复测量，报告中位数和四分位距，结果写入JSON便于跨次运行比较
+    selected为要比较的方法名列表，默认全部；按给出的顺序测量和绘图，第一个方法作为计算加速比的基准
+    """
+    # (名称, 区间判断函数, 可测的最大数值)：试除法在大数上不可行，分段筛需要 √n 以内的基础素数
+    methods = [
+        ("Original", _per_number(is_prime_original), 10**13),
+        ("6k±1 Optimized", _per_number(is_prime_optimized), 10**13),
+        ("Wheel mod 30", _per_number(wheel_30.is_prime), 10**13),
+        ("Wheel mod 210", _per_number(wheel_210.is_prime), 10**13),
+        ("Miller-Rabin", _per_number(lambda n: is_prime_miller_rabin(n, k=5)), 2**64),
+        ("Deterministic M-R", _per_number(is_prime_deterministic), 2**64),
+        ("Segmented Sieve", segmented_sieve, 10**13)
+    ]
+    colors = dict(zip((name for name, _, _ in methods),
+                      ['blue', 'red', 'brown', 'olive', 'green', 'orange', 'purple']))
+    if selected is not None:
+        unknown = [name for name in selected if name not in colors]
+        if unknown:
+            raise ValueError(f"Unknown method(s): {', '.join(unknown)}. "
+                             f"Available: {', '.join(colors)}")
+        by_name = {method[0]: method for method in methods}
+        methods = [by_name[name] for name in dict.fromkeys(selected)]
+    
+    bands = []
+    for band_name, lo, count in BENCHMARK_BANDS:
+        hi = max_num if count is None else lo + count - 1
+        bands.append((band_name, lo, hi))
     
-    # 添加性能比较信息
-    info_text = (f'Original Method: {original_time:.2f}s\n'
-                 f'6k±1 Optimized: {optimized_time:.2f}s ({optimized_speedup:.1f}x faster)\n'
-                 f'Miller-Rabin: {miller_time:.2f}s ({miller_speedup:.1f}x faster)')
+    results = {}
+    for name, check_range, max_value in methods:
+        results[name] = {}
+        for band_name, lo, hi in bands:
+            if hi > max_value:
+                continue
+            print(f"Testing {name} method on band {band_name} [{lo}, {hi}]...")
+            stats = benchmark_method(check_range, lo, hi, warmup, repeats)
+            results[name][band_name] = stats
+            print(f"  median {stats['median_ns'] / 1e6:.3f} ms, IQR {stats['iqr_ns'] / 1e6:.3f} ms")
+    
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version,
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'config': {
+            'max_num': max_num,
+            'warmup': warmup,
+            'repeats': repeats,
+            'bands': {band_name: [lo, hi] for band_name, lo, hi in bands}
+        },
+        'results': results
+    }
+    with open(output_json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results written to {output_json}")
     
-    plt.text(0.02, 0.98, info_text, transform=plt.gca().transAxes, verticalalignment='top',
-             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+    # 设置图表：每个区间一组柱子，高度为每个数的中位耗时，误差线为四分位距
+    plt.figure(figsize=(12, 8))
+    bar_width = 0.8 / len(methods)
+    for idx, (name, _, _) in enumerate(methods):
+        positions, heights, lower, upper = [], [], [], []
+        for band_idx, (band_name, lo, hi) in enumerate(bands):
+            stats = results[name].get(band_name)
+            if stats is None:
+                continue
+            n = stats['numbers']
+            positions.append(band_idx + (idx - (len(methods) - 1) / 2) * bar_width)
+            heights.append(stats['median_ns'] / n)
+            lower.append((stats['median_ns'] - stats['q1_ns']) / n)
+            upper.append((stats['q3_ns'] - stats['median_ns']) / n)
+        plt.bar(positions, heights, bar_width, yerr=[lower, upper], capsize=3,
+                color=colors[name], label=name)
+    
+    plt.xticks(range(len(bands)), [f'{band_name}\n[{lo}, {hi}]' for band_name, lo, hi in bands])
+    plt.yscale('log')
+    plt.xlabel('Number band')
+    plt.ylabel('Median time per number (ns)')
+    plt.title(f'Performance Comparison of Prime Checking Methods ({repeats} runs, median ± IQR)')
+    plt.legend()
+    plt.grid(True, axis='y')
+    
+    # 添加small区间上相对于第一个方法的性能提升（没有small区间结果的方法不列出）
+    small = [(name, results[name]['small']['median_ns']) for name, _, _ in methods
+             if results[name].get('small') is not None]
+    if small:
+        baseline_name, original_time = small[0]
+        info_lines = [f'{baseline_name} (1..{max_num}): {original_time / 1e9:.3f}s']
+        for name, method_time in small[1:]:
+            speedup = original_time / method_time if method_time > 0 else float('inf')
+            info_lines.append(f'{name}: {method_time / 1e9:.3f}s ({speedup:.1f}x faster)')
+        info_text = '\n'.join(info_lines)
+        
+        plt.text(0.02, 0.98, info_text, transform=plt.gca().transAxes, verticalalignment='top',
+                 bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
     
     # 保存图表
     plt.savefig('prime_methods_comparison_high_performance.png', dpi=300, bbox_inches='tight')
@@ -133,81 +626,334 @@ def compare_methods(max_num=100000):
     
     return results
 
-def generate_prime_table_high_performance(filename="prime_table.txt", start=1, columns=6, max_num=100000):
-    """使用最高效方法生成素数表格"""
-    black_char = '■'  # 黑格表示素数
-    white_char = '□'  # 白格表示合数
+BLACK_CHAR = '■'  # 黑格表示素数
+WHITE_CHAR = '□'  # 白格表示合数
+# 两种字符的UTF-8编码，按 [合数, 素数] 排列，供批量格式化查表
+_CELL_BYTES = np.frombuffer((WHITE_CHAR + BLACK_CHAR).encode('utf-8'), dtype=np.uint8).reshape(2, -1)
+
+def format_table_rows(flags, columns):
+    """把一串素性标记按每行columns个格式化为■/□文本，flags须从行首开始，末行可以不满"""
+    flags = np.asarray(flags, dtype=bool)
+    cells = _CELL_BYTES[flags.astype(np.intp)]
+    full_rows = len(flags) // columns
+    body = cells[:full_rows * columns].reshape(full_rows, columns * cells.shape[1])
+    newline = np.full((full_rows, 1), ord('\n'), dtype=np.uint8)
+    text = np.hstack((body, newline)).tobytes()
+    if len(flags) % columns:
+        text += cells[full_rows * columns:].tobytes() + b'\n'
+    return text.decode('utf-8')
+
+# 位图素数表：文件头之后每个奇数占1位（小端位序），偶数中只有2是素数，无需存储
+BITMAP_MAGIC = b'PRIMEBM1'
+BITMAP_HEADER = struct.Struct('<8sQQQ')  # 魔数, start, count(覆盖的整数个数), columns
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def write_prime_bitmap(filename="prime_table.bin", start=1, columns=6, max_num=100000,
+                       segment_size=SIEVE_SEGMENT_SIZE):
+    """
+    把 [start, max_num] 的素性写成只含奇数的位图文件，返回素数个数
+    分段筛出的每段整块打包写入；10⁹ 以内的表约 60MB，而文本表约 3GB
+    """
+    if segment_size % 16:
+        raise ValueError("segment_size must be a multiple of 16")
+    count = max(0, max_num - start + 1)
+    first_odd = start | 1
+    prime_count = 1 if start <= 2 <= max_num else 0
+    
+    with open(filename, 'wb') as file:
+        file.write(BITMAP_HEADER.pack(BITMAP_MAGIC, start, count, columns))
+        # 每段从奇数开始且长度是16的倍数，所以除最后一段外每段都恰好打包成整字节
+        for _, flags in segmented_sieve(first_odd, max_num, segment_size):
+            odd_flags = flags[::2]
+            prime_count += int(odd_flags.sum())
+            file.write(np.packbits(odd_flags, bitorder='little').tobytes())
+    return prime_count
+
+class PrimeBitmap:
+    """
+    以内存映射方式读取 write_prime_bitmap 生成的位图素数表
+    is_prime 为 O(1)，count_primes 按字节查表统计，无需把整个文件读入内存
+    """
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.start, self.count, self.columns = BITMAP_HEADER.unpack_from(self._mmap)
+        if magic != BITMAP_MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a prime bitmap file")
+        self.max_num = self.start + self.count - 1
+        self.first_odd = self.start | 1
+        self.bits = np.frombuffer(self._mmap, dtype=np.uint8, offset=BITMAP_HEADER.size)
+    
+    def close(self):
+        self.bits = None
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _check_range(self, n):
+        if not self.start <= n <= self.max_num:
+            raise ValueError(f"{n} is outside the table range [{self.start}, {self.max_num}]")
+    
+    def is_prime(self, n):
+        self._check_range(n)
+        if n % 2 == 0:
+            return n == 2
+        i = (n - self.first_odd) >> 1
+        return bool((self.bits[i >> 3] >> (i & 7)) & 1)
+    
+    def _count_bits(self, i0, i1, chunk_bytes=1 << 24):
+        """统计位区间 [i0, i1) 中置位的个数"""
+        b0, b1 = i0 >> 3, i1 >> 3
+        if b0 == b1:
+            mask = ((1 << (i1 & 7)) - 1) & ~((1 << (i0 & 7)) - 1)
+            return int(_POPCOUNT_TABLE[self.bits[b0] & mask])
+        
+        total = int(_POPCOUNT_TABLE[self.bits[b0] >> (i0 & 7)])
+        for lo in range(b0 + 1, b1, chunk_bytes):
+            chunk = self.bits[lo:min(lo + chunk_bytes, b1)]
+            total += int(_POPCOUNT_TABLE[chunk].sum(dtype=np.int64))
+        if i1 & 7:
+            total += int(_POPCOUNT_TABLE[self.bits[b1] & ((1 << (i1 & 7)) - 1)])
+        return total
+    
+    def count_primes(self, a, b):
+        """统计 [a, b] 与表的交集内的素数个数"""
+        a = max(a, self.start)
+        b = min(b, self.max_num)
+        if a > b:
+            return 0
+        total = 1 if a <= 2 <= b else 0
+        first = a | 1
+        if first <= b:
+            total += self._count_bits((first - self.first_odd) >> 1, ((b - self.first_odd) >> 1) + 1)
+        return total
+    
+    def flags(self, a, b):
+        """返回 [a, b] 内每个数是否为素数的布尔数组"""
+        self._check_range(a)
+        self._check_range(b)
+        out = np.zeros(b - a + 1, dtype=bool)
+        first = a | 1
+        if first <= b:
+            i0 = (first - self.first_odd) >> 1
+            i1 = (b - self.first_odd) >> 1
+            bits = np.unpackbits(self.bits[i0 >> 3:(i1 >> 3) + 1], bitorder='little')
+            out[first - a::2] = bits[(i0 & 7):(i0 & 7) + i1 - i0 + 1]
+        if a <= 2 <= b:
+            out[2 - a] = True
+        return out
+    
+    def render_rows(self, first_row=0, num_rows=10):
+        """按生成时的行列布局渲染 ■/□ 文本，与文本表格中对应的行完全一致"""
+        a = self.start + first_row * self.columns
+        if a > self.max_num:
+            return ''
+        b = min(a + num_rows * self.columns - 1, self.max_num)
+        return format_table_rows(self.flags(a, b), self.columns)
+
+def _serial_table_chunks(start, columns, max_num):
+    """逐行用确定性Miller-Rabin判断，产出 (一行文本, 该行最后一个数, 该行素数个数)"""
+    num = start
+    while num <= max_num:
+        row_end = min(num + columns - 1, max_num)
+        flags = [is_prime_deterministic(n) for n in range(num, row_end + 1)]
+        row = ''.join(BLACK_CHAR if is_prime else WHITE_CHAR for is_prime in flags)
+        yield row + '\n', row_end, sum(flags)
+        num = row_end + 1
+
+def _table_chunk(lo, hi, columns):
+    """工作进程：用分段筛判断[lo, hi]并格式化为表格行，lo须位于行首"""
+    flags = np.concatenate([flags for _, flags in segmented_sieve(lo, hi)])
+    return format_table_rows(flags, columns), int(flags.sum())
+
+def _ignore_sigint():
+    """进程池初始化：工作进程忽略Ctrl+C，由主进程统一停止并保存检查点"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _parallel_table_chunks(start, columns, max_num, workers, chunk_rows=None):
+    """
+    把区间按整行切块交给进程池，按提交顺序取回结果
+    同时在途的块最多 workers*2 个，既让每个核都有活干，也限制了内存占用
+    """
+    if chunk_rows is None:
+        chunk_rows = max(1, SIEVE_SEGMENT_SIZE // columns)
+    chunk_size = chunk_rows * columns
+    
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint) as pool:
+        try:
+            lo = start
+            while lo <= max_num or pending:
+                while lo <= max_num and len(pending) < workers * 2:
+                    hi = min(lo + chunk_size - 1, max_num)
+                    pending.append((hi, pool.submit(_table_chunk, lo, hi, columns)))
+                    lo = hi + 1
+                hi, future = pending.popleft()
+                text, primes = future.result()
+                yield text, hi, primes
+        finally:
+            # 提前结束（如被中断）时取消尚未开始的块
+            for _, future in pending:
+                future.cancel()
+
+def _load_checkpoint(checkpoint_file, filename, start, columns, max_num):
+    """读取与本次参数一致的检查点；不存在、参数不符或输出文件不完整时返回None"""
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (state.get('start'), state.get('columns'), state.get('max_num')) != (start, columns, max_num):
+        return None
+    if not os.path.exists(filename) or os.path.getsize(filename) < state['file_offset']:
+        return None
+    return state
+
+def _save_checkpoint(checkpoint_file, state):
+    """先写临时文件再替换，保证检查点文件始终完整"""
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_file, checkpoint_file)
+
+def generate_prime_table_high_performance(filename="prime_table.txt", start=1, columns=6, max_num=100000, workers=1,
+                                          resume=True, checkpoint_interval=10.0, plot_interval=0.5):
+    """
+    使用最高效方法生成素数表格
+    workers > 1 时把区间按整行分块交给进程池用分段筛计算，按顺序写入，输出文件与单进程逐字节相同
+    每隔checkpoint_interval秒在 filename.ckpt 中记录已完成的数、素数个数和文件偏移，
+    中断后以相同参数再次运行会从检查点续写（resume=False 则从头开始）
+    生成在后台线程中进行，主线程每隔plot_interval秒读取共享进度增量更新图表，绘图不会拖慢生成
+    """
+    checkpoint_file = filename + '.ckpt'
+    state = _load_checkpoint(checkpoint_file, filename, start, columns, max_num) if resume else None
+    if state:
+        resume_num = state['next_num']
+        prime_count = state['prime_count']
+        print(f"Resuming from number {resume_num} ({prime_count} primes found so far)")
+    else:
+        resume_num = start
+        prime_count = 0
+    
+    # 检查点总是落在行首，续写的行布局与一次性生成完全相同
+    if workers > 1:
+        chunks = _parallel_table_chunks(resume_num, columns, max_num, workers)
+        method_name = f'Segmented Sieve x{workers} processes'
+    else:
+        chunks = _serial_table_chunks(resume_num, columns, max_num)
+        method_name = 'Deterministic Miller-Rabin'
+    
+    # 生成线程写、绘图线程读的共享进度
+    num = resume_num
+    checkpoint_num = None  # 最近一次检查点记录到的数
+    finished = False
+    error = None
+    stop_event = threading.Event()
+    
+    def save_checkpoint(file):
+        nonlocal checkpoint_num
+        file.flush()
+        _save_checkpoint(checkpoint_file, {
+            'start': start, 'columns': columns, 'max_num': max_num,
+            'next_num': num, 'prime_count': prime_count, 'file_offset': file.tell()
+        })
+        checkpoint_num = num
+    
+    def generate():
+        """生成线程：逐块写入文件，每块之间检查停止信号，因此停止时的检查点总是完整的"""
+        nonlocal num, prime_count, finished, error
+        last_checkpoint_time = time.time()
+        try:
+            with open(filename, 'r+' if state else 'w', encoding='utf-8') as file:
+                if state:
+                    # 丢弃检查点之后写入的不完整内容
+                    file.seek(state['file_offset'])
+                    file.truncate()
+                try:
+                    for text, last_num, primes in chunks:
+                        # 将整行写入文件
+                        file.write(text)
+                        prime_count += primes
+                        num = last_num + 1
+                        
+                        if stop_event.is_set():
+                            save_checkpoint(file)
+                            return
+                        
+                        # 定期保存检查点
+                        current_time = time.time()
+                        if current_time - last_checkpoint_time >= checkpoint_interval:
+                            save_checkpoint(file)
+                            last_checkpoint_time = current_time
+                except KeyboardInterrupt:
+                    # 中断来自取块过程（如工作进程收到SIGINT）：已写入的都是整块，先保存检查点
+                    save_checkpoint(file)
+                    raise
+                finished = True
+        except BaseException as e:
+            error = e
+        finally:
+            chunks.close()
     
-    prime_count = 0
     start_time = time.time()
-    last_update_time = time.time()
     
-    # 设置实时图表
+    # 设置实时图表：只创建一次线条和文字，之后只更新数据
     plt.ion()
     fig, ax = plt.subplots(figsize=(10, 6))
     time_points = []
     count_points = []
+    line, = ax.plot([], [], 'b-', linewidth=2)
+    speed_text = ax.text(0.02, 0.98, '', transform=ax.transAxes, verticalalignment='top',
+                         bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
     
     # 初始绘制
     ax.set_xlabel('Time (seconds)')
     ax.set_ylabel('Numbers Checked')
-    ax.set_title(f'Prime Checking Progress (Miller-Rabin Method)')
+    ax.set_title(f'Prime Checking Progress ({method_name})')
     ax.grid(True)
     plt.draw()
     plt.pause(0.1)
     
-    with open(filename, 'w', encoding='utf-8') as file:
-        num = start
-        try:
-            while num <= max_num:
-                # 生成一行
-                row = []
-                for _ in range(columns):
-                    if num > max_num:
-                        break
-                    
-                    # 使用最高效的Miller-Rabin方法
-                    is_prime = is_prime_miller_rabin(num, k=5)
-                    
-                    if is_prime:
-                        row.append(black_char)
-                        prime_count += 1
-                    else:
-                        row.append(white_char)
-                    
-                    num += 1
-                
-                # 将行写入文件
-                file.write(''.join(row) + '\n')
-                
-                # 定期更新图表（每秒最多更新一次）
-                current_time = time.time()
-                if current_time - last_update_time >= 0.5 or num > max_num:
-                    elapsed = current_time - start_time
-                    time_points.append(elapsed)
-                    count_points.append(num - 1)
-                    
-                    # 更新图表
-                    ax.clear()
-                    if count_points:
-                        ax.plot(time_points, count_points, 'b-', linewidth=2)
-                    ax.set_xlabel('Time (seconds)')
-                    ax.set_ylabel('Numbers Checked')
-                    ax.set_title(f'Prime Checking Progress (Miller-Rabin Method) - {num-1}/{max_num}')
-                    ax.grid(True)
-                    
-                    # 添加当前速度信息
-                    if len(time_points) > 1:
-                        # 计算平均速度
-                        avg_speed = count_points[-1] / elapsed
-                        ax.text(0.02, 0.98, f'Avg speed: {avg_speed:.1f} numbers/sec', 
-                                transform=ax.transAxes, verticalalignment='top',
-                                bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-                    
-                    plt.draw()
-                    plt.pause(0.001)
-                    last_update_time = current_time
-                
+    def update_plot():
+        """读取共享进度并增量更新图表"""
+        elapsed = time.time() - start_time
+        checked = num - 1
+        time_points.append(elapsed)
+        count_points.append(checked)
+        line.set_data(time_points, count_points)
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_title(f'Prime Checking Progress ({method_name}) - {checked}/{max_num}')
+        if elapsed > 0:
+            # 计算本次运行的平均速度
+            speed_text.set_text(f'Avg speed: {(num - resume_num) / elapsed:.1f} numbers/sec')
+        fig.canvas.draw_idle()
+    
+    worker = threading.Thread(target=generate, daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            plt.pause(plot_interval)
+            update_plot()
+    except KeyboardInterrupt:
+        # 通知生成线程在当前块写完后保存检查点并退出
+        stop_event.set()
+        worker.join()
+    
+    try:
+        # 生成线程因中断退出时检查点已保存，与主线程收到Ctrl+C一样按中断处理
+        if error is not None and not isinstance(error, KeyboardInterrupt):
+            raise error
+        update_plot()
+        
+        if finished:
             # 最终统计
             density = (prime_count / max_num) * 100
             total_time = time.time() - start_time
@@ -216,32 +962,63 @@ def generate_prime_table_high_performance(filename="prime_table.txt", start=1, c
             print(f"Primes found: {prime_count}")
             print(f"Prime density: {density:.6f}%")
             print(f"Total time: {total_time:.2f} seconds")
-            print(f"Average speed: {max_num/total_time:.1f} numbers/second")
+            print(f"Average speed: {(num - resume_num)/total_time:.1f} numbers/second")
             
-        except KeyboardInterrupt:
+            if os.path.exists(checkpoint_file):
+                os.remove(checkpoint_file)
+        else:
             print(f"\nInterrupted at number {num}")
-        
-        finally:
-            # 确保最终图表被保存
-            plt.savefig('prime_check_progress_miller_rabin.png', dpi=300, bbox_inches='tight')
-            plt.ioff()
-            plt.show()
+            if checkpoint_num is not None:
+                print(f"Checkpoint saved at number {checkpoint_num}; run again with the same parameters to resume")
+    
+    finally:
+        # 确保最终图表被保存
+        plt.savefig('prime_check_progress_miller_rabin.png', dpi=300, bbox_inches='tight')
+        plt.ioff()
+        plt.show()
 
 if __name__ == '__main__':
     print("High-Performance Prime Number Checker")
-    print("1. Compare three methods")
-    print("2. Generate prime table with Miller-Rabin method")
+    print("1. Compare prime checking methods")
+    print("2. Generate prime table with deterministic Miller-Rabin method")
+    print("3. Generate compact bit-packed prime table")
+    print("4. Prime counting queries")
     
-    choice = input("Enter choice (1 or 2): ").strip()
+    choice = input("Enter choice (1, 2, 3 or 4): ").strip()
     
     if choice == "1":
         max_num = int(input("Enter maximum number to check (default 100000): ") or "100000")
-        compare_methods(max_num)
+        repeats = int(input("Enter repetitions per method (default 5): ") or "5")
+        selected = input("Enter method names separated by commas (default all): ").strip()
+        try:
+            compare_methods(max_num, repeats=repeats,
+                            selected=[name.strip() for name in selected.split(',')] if selected else None)
+        except ValueError as e:
+            print(e)
+    elif choice == "4":
+        n = int(input("Enter n (default 1000000): ") or "1000000")
+        start_time = time.time()
+        print(f"pi({n}) = {prime_pi(n)}")
+        print(f"The {n}th prime is {nth_prime(n)}")
+        print(f"Primes in [{n}, {n + 100}]: {primes_in_range(n, n + 100).tolist()}")
+        print(f"Total time: {time.time() - start_time:.2f} seconds")
+    elif choice == "3":
+        filename = input("Enter output filename (default prime_table.bin): ").strip() or "prime_table.bin"
+        start_num = int(input("Enter start number (default 1): ") or "1")
+        columns = int(input("Enter columns per row (default 6): ") or "6")
+        max_num = int(input("Enter maximum number to check (default 100000): ") or "100000")
+        start_time = time.time()
+        prime_count = write_prime_bitmap(filename, start_num, columns, max_num)
+        print(f"\nPrimes found: {prime_count}")
+        print(f"Total time: {time.time() - start_time:.2f} seconds")
+        with PrimeBitmap(filename) as table:
+            print(table.render_rows(0, 5))
     else:
         filename = input("Enter output filename (default prime_table.txt): ").strip() or "prime_table.txt"
         start_num = int(input("Enter start number (default 1): ") or "1")
         columns = int(input("Enter columns per row (default 6): ") or "6")
         max_num = int(input("Enter maximum number to check (default 100000): ") or "100000")
-        generate_prime_table_high_performance(filename, start_num, columns, max_num)
+        workers = int(input(f"Enter worker processes (default {os.cpu_count()}): ") or str(os.cpu_count()))
+        generate_prime_table_high_performance(filename, start_num, columns, max_num, workers)
     
     input("\nPress Enter to exit...")
\ No newline at end of file
@@ -1,10 +1,530 @@
 import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+from matplotlib.patches import Polygon, Rectangle
+from matplotlib.collections import LineCollection, PolyCollection
 import numpy as np
 import colorsys
+import heapq
+
+MORTON_MAX_DEPTH = 32  # 每个坐标最多 32 位，交错后恰好放进 uint64
+
+def _spread_bits(v):
+    """把 32 位整数的每一位隔位展开：b31..b1b0 -> 0b31..0b10b0"""
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+def _compact_bits(v):
+    """_spread_bits 的逆运算：取出偶数位并压紧"""
+    v = v & np.uint64(0x5555555555555555)
+    v = (v | (v >> np.uint64(1))) & np.uint64(0x3333333333333333)
+    v = (v | (v >> np.uint64(2))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v >> np.uint64(4))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v >> np.uint64(8))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v >> np.uint64(16))) & np.uint64(0x00000000FFFFFFFF)
+    return v
+
+def morton_encode(points, bounds=(0, 10, 0, 10), depth=7):
+    """把点直接编码为 Z 序（Morton）码，等价于 depth 层二分定位的结果
+    
+    坐标量化为 2**depth 个格子的整数下标后按位交错：x 占偶数位、y 占奇数位，
+    因此最高的两位就是第一层的象限编号（0=左下, 1=右下, 2=左上, 3=右上）。
+    量化用 ceil(t) - 1，使正好落在格线上的点归左/下，与逐层二分一致
+    （仅在浮点舍入恰好跨过格线时可能差一格）。
+    code >> 2*k 即为上溯 k 层的祖先单元格，可用于分桶。
+    """
+    if not 0 <= depth <= MORTON_MAX_DEPTH:
+        raise ValueError(f"depth 需在 0..{MORTON_MAX_DEPTH} 之间")
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    xmin, xmax, ymin, ymax = bounds
+    cells = 2 ** depth
+    
+    ix = np.ceil((points[:, 0] - xmin) / (xmax - xmin) * cells) - 1
+    iy = np.ceil((points[:, 1] - ymin) / (ymax - ymin) * cells) - 1
+    ix = np.clip(ix, 0, cells - 1).astype(np.uint64)
+    iy = np.clip(iy, 0, cells - 1).astype(np.uint64)
+    return _spread_bits(ix) | (_spread_bits(iy) << np.uint64(1))
+
+def morton_decode(codes, bounds=(0, 10, 0, 10), depth=7):
+    """把 Morton 码还原为单元格边界，返回形如 (n, 4) 的 [xmin, xmax, ymin, ymax]"""
+    codes = np.asarray(codes, dtype=np.uint64).reshape(-1)
+    xmin, xmax, ymin, ymax = bounds
+    cell_w = (xmax - xmin) / 2 ** depth
+    cell_h = (ymax - ymin) / 2 ** depth
+    
+    ix = _compact_bits(codes).astype(float)
+    iy = _compact_bits(codes >> np.uint64(1)).astype(float)
+    return np.column_stack([xmin + ix * cell_w, xmin + (ix + 1) * cell_w,
+                            ymin + iy * cell_h, ymin + (iy + 1) * cell_h])
+
+def morton_order(points, bounds=(0, 10, 0, 10), depth=7):
+    """按 Z 序排列点，返回 (排序下标, 排好序的 Morton 码)"""
+    codes = morton_encode(points, bounds, depth)
+    order = np.argsort(codes, kind='stable')
+    return order, codes[order]
+
+def _region_edges(regions):
+    """把多边形列表展开为 (m, 4) 的边数组 [x1, y1, x2, y2]"""
+    edges = [np.empty((0, 4))]
+    for polygon in regions:
+        polygon = np.asarray(polygon, dtype=float).reshape(-1, 2)
+        edges.append(np.hstack([polygon, np.roll(polygon, -1, axis=0)]))
+    return np.concatenate(edges)
+
+def _cells_crossed(cells, edges):
+    """判断每个单元格（闭矩形）是否与任一区域边界相交
+    
+    先做包围盒重叠测试，再看单元格四个角是否全在边所在直线的同一侧。
+    """
+    if len(edges) == 0:
+        return np.zeros(len(cells), dtype=bool)
+    xmin, xmax, ymin, ymax = (cells[:, i:i + 1] for i in range(4))
+    x1, y1, x2, y2 = edges.T
+    overlap = ((np.minimum(x1, x2) <= xmax) & (np.maximum(x1, x2) >= xmin) &
+               (np.minimum(y1, y2) <= ymax) & (np.maximum(y1, y2) >= ymin))
+    dx, dy = x2 - x1, y2 - y1
+    sides = [dx * (cy - y1) - dy * (cx - x1)
+             for cx, cy in ((xmin, ymin), (xmax, ymin), (xmin, ymax), (xmax, ymax))]
+    low = np.minimum.reduce(sides)
+    high = np.maximum.reduce(sides)
+    return (overlap & (low <= 0) & (high >= 0)).any(axis=1)
+
+def classify_points(points, regions):
+    """奇偶规则判断每个点落在哪个区域，返回区域下标（都不在时为 -1，重叠时取第一个）"""
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    x, y = points[:, 0:1], points[:, 1:2]
+    labels = np.full(len(points), -1)
+    for index in reversed(range(len(regions))):
+        x1, y1, x2, y2 = _region_edges([regions[index]]).T
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside = (crosses & (x < x_cross)).sum(axis=1) % 2 == 1
+        labels[inside] = index
+    return labels
+
+class LocationResult:
+    """批量定位的结果
+    
+    paths[i] 为第 i 个点逐层选择的象限编号序列（即四叉树键），只有前 levels[i] 层有效，
+    cells[i] 为最终单元格 [xmin, xmax, ymin, ymax]，
+    记录模式下 history[level, i] 为第 i 个点在该层细分前所在的单元格（已停止的点为 NaN），
+    提供区域时 regions[i] 为点所在区域的下标（-1 表示不在任何区域内）。
+    """
+    def __init__(self, points, paths, cells, levels, history=None, regions=None):
+        self.points = points
+        self.paths = paths
+        self.cells = cells
+        self.levels = levels
+        self.history = history
+        self.regions = regions
+    
+    def keys(self):
+        """以字符串形式返回每个点的四叉树键，如 '0312...'"""
+        return [''.join(str(q) for q in path[:level])
+                for path, level in zip(self.paths, self.levels)]
+    
+    def morton_codes(self):
+        """把象限路径打包成 Morton 码（每层两位，第一层在最高位）
+        
+        提前停止的点其余各层按 0 补齐，即落在所停单元格的左下角。
+        """
+        depth = self.paths.shape[1]
+        if depth > MORTON_MAX_DEPTH:
+            raise ValueError(f"路径超过 {MORTON_MAX_DEPTH} 层，无法放进 uint64")
+        codes = np.zeros(len(self.paths), dtype=np.uint64)
+        for level in range(depth):
+            codes = (codes << np.uint64(2)) | self.paths[:, level].astype(np.uint64)
+        return codes
+
+class QuadrantLocator:
+    """不依赖绘图的二分定位引擎
+    
+    对一批点同时做四象限下降：每一层把每个点当前所在的单元格一分为四，
+    与中点比较选出象限（与逐点定位一致，等于中点时归左/下）。
+    象限编号：0=左下, 1=右下, 2=左上, 3=右上。
+    min_size 可小到 np.finfo(float).eps，但单元格不会细分到小于坐标的浮点间距。
+    给定区域（多边形列表）时，单元格不再与任何区域边界相交的点提前停止。
+    """
+    def __init__(self, bounds=(0, 10, 0, 10), min_size=0.1, regions=None):
+        if not min_size > 0:
+            raise ValueError("min_size 必须为正数")
+        self.bounds = tuple(bounds)  # (xmin, xmax, ymin, ymax)
+        self.min_size = min_size
+        self.regions = regions
+        self._edges = _region_edges(regions) if regions is not None else None
+    
+    def depth(self):
+        """单元格宽或高小于 min_size（或达到浮点分辨率）之前需要细分的层数"""
+        xmin, xmax, ymin, ymax = self.bounds
+        width, height = xmax - xmin, ymax - ymin
+        # 再细分下去中点就会与边界重合
+        resolution = 2 * np.spacing(max(abs(v) for v in self.bounds))
+        depth = 0
+        while (width >= self.min_size and height >= self.min_size and
+               width / 2 >= resolution and height / 2 >= resolution):
+            width /= 2
+            height /= 2
+            depth += 1
+        return depth
+    
+    def locate(self, points, record=False):
+        """定位一批点，points 形如 [(x, y), ...]；record=True 时记录每层的单元格供回放"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        n = len(points)
+        depth = self.depth()
+        
+        cells = np.tile(np.asarray(self.bounds, dtype=float), (n, 1))
+        paths = np.zeros((n, depth), dtype=np.uint8)
+        levels = np.full(n, depth)
+        history = np.full((depth, n, 4), np.nan) if record else None
+        labels = np.full(n, -1) if self.regions is not None else None
+        active = np.arange(n)  # 仍需继续细分的点
+        
+        for level in range(depth):
+            if self.regions is not None:
+                # 单元格与所有边界都不相交时，整格同属一个区域，用格心分类后停止
+                # （同一格中的点很多，相交测试只对不同的单元格做一次）
+                unique, inverse = np.unique(cells[active], axis=0, return_inverse=True)
+                settled = ~_cells_crossed(unique, self._edges)[inverse.reshape(-1)]
+                done = active[settled]
+                centers = np.column_stack([(cells[done, 0] + cells[done, 1]) / 2,
+                                           (cells[done, 2] + cells[done, 3]) / 2])
+                labels[done] = classify_points(centers, self.regions)
+                levels[done] = level
+                active = active[~settled]
+                if len(active) == 0:
+                    break
+            
+            if record:
+                history[level, active] = cells[active]
+            current = cells[active]
+            x, y = points[active, 0], points[active, 1]
+            mid_x = (current[:, 0] + current[:, 1]) / 2
+            mid_y = (current[:, 2] + current[:, 3]) / 2
+            right = x > mid_x
+            top = y > mid_y
+            
+            # 收缩到所选象限
+            current[:, 0] = np.where(right, mid_x, current[:, 0])
+            current[:, 1] = np.where(right, current[:, 1], mid_x)
+            current[:, 2] = np.where(top, mid_y, current[:, 2])
+            current[:, 3] = np.where(top, current[:, 3], mid_y)
+            cells[active] = current
+            paths[active, level] = right + 2 * top
+        
+        if self.regions is not None and len(active):
+            # 细分到最小单元格仍有歧义的点，直接按点本身分类
+            labels[active] = classify_points(points[active], self.regions)
+        
+        return LocationResult(points, paths, cells, levels, history, labels)
+    
+    def morton_codes(self, points):
+        """不做逐层下降，直接量化得到与 locate 相同深度的 Morton 码"""
+        return morton_encode(points, self.bounds, self.depth())
+
+class QuadtreeNode:
+    """四叉树节点：叶子在 bucket 中保存点编号，内部节点的 children 按象限编号排列"""
+    __slots__ = ('bounds', 'depth', 'count', 'children', 'bucket')
+    
+    def __init__(self, bounds, depth):
+        self.bounds = bounds  # (xmin, xmax, ymin, ymax)
+        self.depth = depth
+        self.count = 0  # 子树中的点数
+        self.children = None
+        self.bucket = np.empty(0, dtype=np.int64)
+    
+    def is_leaf(self):
+        return self.children is None
+    
+    def split_bounds(self):
+        """与二分定位相同的田字格划分，返回四个象限的边界"""
+        xmin, xmax, ymin, ymax = self.bounds
+        mid_x = (xmin + xmax) / 2
+        mid_y = (ymin + ymax) / 2
+        return [(xmin, mid_x, ymin, mid_y), (mid_x, xmax, ymin, mid_y),
+                (xmin, mid_x, mid_y, ymax), (mid_x, xmax, mid_y, ymax)]
+
+class PointQuadtree:
+    """持久化的分桶点域四叉树
+    
+    每个叶子最多容纳 capacity 个点，超出时按 PointLocator 的田字格一分为四，
+    象限选择规则与 QuadrantLocator 相同（等于中点时归左/下）。
+    点坐标集中存放在一个 numpy 数组中，节点只保存点编号。
+    """
+    def __init__(self, bounds=(0, 10, 0, 10), capacity=16, max_depth=MORTON_MAX_DEPTH):
+        self.bounds = tuple(bounds)
+        self.capacity = capacity
+        self.max_depth = max_depth  # 到达最大深度后叶子不再分裂（可容纳重复点）
+        self.root = QuadtreeNode(self.bounds, 0)
+        self._xy = np.empty((0, 2))
+        self._alive = np.empty(0, dtype=bool)
+        self._size = 0  # 已分配的编号数（删除的编号不复用）
+    
+    def __len__(self):
+        return self.root.count
+    
+    def ids(self):
+        """当前树中所有点的编号"""
+        return np.flatnonzero(self._alive[:self._size])
+    
+    def points(self, ids):
+        """按编号取坐标"""
+        return self._xy[np.asarray(ids, dtype=np.int64)]
+    
+    def _allocate(self, points):
+        """把新点追加到坐标数组，返回分配的编号"""
+        n = len(points)
+        if self._size + n > len(self._xy):
+            capacity = max(1024, 2 * len(self._xy), self._size + n)
+            xy = np.empty((capacity, 2))
+            xy[:self._size] = self._xy[:self._size]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:self._size] = self._alive[:self._size]
+            self._xy, self._alive = xy, alive
+        ids = np.arange(self._size, self._size + n)
+        self._xy[ids] = points
+        self._alive[ids] = True
+        self._size += n
+        return ids
+    
+    def _check_bounds(self, points):
+        xmin, xmax, ymin, ymax = self.bounds
+        x, y = points[:, 0], points[:, 1]
+        if not ((x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)).all():
+            raise ValueError(f"点超出四叉树范围 {self.bounds}")
+    
+    def _quadrants(self, node, ids):
+        """计算 ids 中各点在 node 下所属的象限编号"""
+        xmin, xmax, ymin, ymax = node.bounds
+        xy = self._xy[ids]
+        return (xy[:, 0] > (xmin + xmax) / 2) + 2 * (xy[:, 1] > (ymin + ymax) / 2)
+    
+    def _build(self, node, ids):
+        """把 ids 放进以 node 为根的空子树，必要时递归分裂"""
+        node.count = len(ids)
+        if len(ids) <= self.capacity or node.depth >= self.max_depth:
+            node.children = None
+            node.bucket = ids
+            return
+        quadrants = self._quadrants(node, ids)
+        order = np.argsort(quadrants, kind='stable')
+        splits = np.searchsorted(quadrants[order], [1, 2, 3])
+        node.bucket = np.empty(0, dtype=np.int64)
+        node.children = []
+        for q, (bounds, part) in enumerate(zip(node.split_bounds(), np.split(ids[order], splits))):
+            child = QuadtreeNode(bounds, node.depth + 1)
+            self._build(child, part)
+            node.children.append(child)
+    
+    def _collect(self, node):
+        """收集子树中所有点编号"""
+        if node.is_leaf():
+            return node.bucket
+        return np.concatenate([self._collect(child) for child in node.children])
+    
+    def bulk_load(self, points):
+        """批量加载点，返回它们的编号；空树时自顶向下一次性建树"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self._check_bounds(points)
+        ids = self._allocate(points)
+        if len(self) == 0:
+            self._build(self.root, ids)
+        else:
+            self._build(self.root, np.concatenate([self._collect(self.root), ids]))
+        return ids
+    
+    def insert(self, x, y):
+        """插入一个点，返回编号"""
+        point = np.array([[x, y]], dtype=float)
+        self._check_bounds(point)
+        point_id = self._allocate(point)
+        
+        node = self.root
+        while True:
+            node.count += 1
+            if node.is_leaf():
+                break
+            node = node.children[int(self._quadrants(node, point_id)[0])]
+        
+        bucket = np.append(node.bucket, point_id)
+        if len(bucket) > self.capacity:
+            self._build(node, bucket)
+        else:
+            node.bucket = bucket
+        return int(point_id[0])
+    
+    def delete(self, point_id):
+        """删除编号为 point_id 的点，点不存在时返回 False"""
+        if not (0 <= point_id < self._size and self._alive[point_id]):
+            return False
+        ids = np.array([point_id])
+        
+        path = [self.root]
+        while not path[-1].is_leaf():
+            node = path[-1]
+            path.append(node.children[int(self._quadrants(node, ids)[0])])
+        
+        leaf = path[-1]
+        leaf.bucket = leaf.bucket[leaf.bucket != point_id]
+        self._alive[point_id] = False
+        for node in path:
+            node.count -= 1
+        
+        # 自上而下找到第一个点数不超过容量的内部节点，把它合并回叶子
+        for node in path[:-1]:
+            if node.count <= self.capacity:
+                node.bucket = self._collect(node)
+                node.children = None
+                break
+        return True
+    
+    def range_query(self, xmin, xmax, ymin, ymax):
+        """返回落在闭矩形 [xmin, xmax] x [ymin, ymax] 内的点编号"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            nx0, nx1, ny0, ny1 = node.bounds
+            if node.count == 0 or nx0 > xmax or nx1 < xmin or ny0 > ymax or ny1 < ymin:
+                continue
+            if xmin <= nx0 and nx1 <= xmax and ymin <= ny0 and ny1 <= ymax:
+                found.append(self._collect(node))  # 节点整体在矩形内
+            elif node.is_leaf():
+                xy = self._xy[node.bucket]
+                inside = ((xy[:, 0] >= xmin) & (xy[:, 0] <= xmax) &
+                          (xy[:, 1] >= ymin) & (xy[:, 1] <= ymax))
+                found.append(node.bucket[inside])
+            else:
+                stack.extend(node.children)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)
+    
+    def knn(self, x, y, k=1):
+        """返回距 (x, y) 最近的 k 个点的编号和距离（按距离升序）
+        
+        按节点到查询点的最小距离做最佳优先搜索，
+        当下一个节点比当前第 k 近的点还远时停止。
+        """
+        best_ids = np.empty(0, dtype=np.int64)
+        best_d2 = np.empty(0)
+        if k < 1:
+            return best_ids, best_d2
+        heap = [(0.0, 0, self.root)]
+        counter = 1  # 距离相同时的次序，避免比较节点对象
+        while heap:
+            d2, _, node = heapq.heappop(heap)
+            if len(best_d2) == k and d2 > best_d2[-1]:
+                break
+            if node.is_leaf():
+                if len(node.bucket) == 0:
+                    continue
+                xy = self._xy[node.bucket]
+                dist2 = (xy[:, 0] - x) ** 2 + (xy[:, 1] - y) ** 2
+                ids = np.concatenate([best_ids, node.bucket])
+                dist2 = np.concatenate([best_d2, dist2])
+                order = np.argsort(dist2, kind='stable')[:k]
+                best_ids, best_d2 = ids[order], dist2[order]
+                continue
+            for child in node.children:
+                if child.count == 0:
+                    continue
+                cx0, cx1, cy0, cy1 = child.bounds
+                dx = max(cx0 - x, 0.0, x - cx1)
+                dy = max(cy0 - y, 0.0, y - cy1)
+                heapq.heappush(heap, (dx * dx + dy * dy, counter, child))
+                counter += 1
+        return best_ids, np.sqrt(best_d2)
+
+def _step_colors(levels):
+    """按层号（从 1 开始）计算填充色，配色与逐层定位动画一致"""
+    colors = []
+    for level in levels:
+        hue = (level * 30) % 360  # 每步旋转30度
+        value = 0.9 - min(0.3, level * 0.03)  # 随着层数增加，亮度略微降低
+        colors.append(colorsys.hsv_to_rgb(hue / 360, 0.6, value))
+    return np.array(colors).reshape(-1, 3)
+
+def _cell_polygons(cells):
+    """把 (m, 4) 的单元格 [xmin, xmax, ymin, ymax] 转为 (m, 4, 2) 的矩形顶点"""
+    xmin, xmax, ymin, ymax = np.asarray(cells, dtype=float).reshape(-1, 4).T
+    return np.stack([np.column_stack([xmin, ymin]), np.column_stack([xmax, ymin]),
+                     np.column_stack([xmax, ymax]), np.column_stack([xmin, ymax])], axis=1)
+
+def _cell_crosses(cells):
+    """把 (m, 4) 的单元格转为 (2m, 2, 2) 的田字格线段"""
+    xmin, xmax, ymin, ymax = np.asarray(cells, dtype=float).reshape(-1, 4).T
+    mid_x = (xmin + xmax) / 2
+    mid_y = (ymin + ymax) / 2
+    hlines = np.stack([np.column_stack([xmin, mid_y]), np.column_stack([xmax, mid_y])], axis=1)
+    vlines = np.stack([np.column_stack([mid_x, ymin]), np.column_stack([mid_x, ymax])], axis=1)
+    return np.concatenate([hlines, vlines])
+
+def draw_subdivision(ax, history):
+    """用一个 PolyCollection 和一个 LineCollection 绘制细分过程
+    
+    history 形如 (depth, n, 4)，即 LocationResult.history；
+    多个点在同一层共享的单元格只画一次，已停止细分的点（NaN）跳过。
+    """
+    cells = [np.empty((0, 4))]
+    levels = [np.empty(0, dtype=int)]
+    for level, layer in enumerate(history, start=1):
+        unique = np.unique(layer[~np.isnan(layer[:, 0])], axis=0)
+        cells.append(unique)
+        levels.append(np.full(len(unique), level))
+    cells = np.concatenate(cells)
+    levels = np.concatenate(levels)
+    
+    fills = PolyCollection(_cell_polygons(cells), facecolors=_step_colors(levels),
+                           alpha=0.3, edgecolors='none')
+    lines = LineCollection(_cell_crosses(cells), colors='blue', alpha=0.7)
+    ax.add_collection(fills)
+    ax.add_collection(lines)
+    return fills, lines
+
+def draw_cells(ax, cells, facecolor='orange', alpha=0.5):
+    """用一个 PolyCollection 绘制大量点最终所在的单元格"""
+    collection = PolyCollection(_cell_polygons(cells), facecolors=facecolor,
+                                alpha=alpha, edgecolors='none')
+    ax.add_collection(collection)
+    return collection
+
+def _internal_cells(node, cells):
+    """递归收集四叉树中所有内部节点的边界"""
+    if node.is_leaf():
+        return
+    cells.append(node.bounds)
+    for child in node.children:
+        _internal_cells(child, cells)
+
+def draw_quadtree(ax, node, color='gray', alpha=0.5):
+    """递归收集四叉树的田字格划分，并用一个 LineCollection 绘制"""
+    cells = []
+    _internal_cells(node, cells)
+    lines = LineCollection(_cell_crosses(cells), colors=color, alpha=alpha, linewidths=0.8)
+    ax.add_collection(lines)
+    return lines
+
+def show_locations(result, bounds=(0, 10, 0, 10)):
+    """在新图形中显示一批点的定位结果：最终单元格、（若有记录）细分过程和点本身"""
+    fig, ax = plt.subplots(figsize=(8, 8))
+    xmin, xmax, ymin, ymax = bounds
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.set_aspect('equal')
+    ax.set_title(f'{len(result.points)} points located')
+    if result.history is not None:
+        draw_subdivision(ax, result.history)
+    draw_cells(ax, result.cells)
+    ax.plot(result.points[:, 0], result.points[:, 1], 'r.', markersize=2)
+    plt.show()
 
 class PointLocator:
-    def __init__(self):
+    def __init__(self, animate=True, tree=None, precision=0.1, regions=None):
         self.fig, self.ax = plt.subplots(figsize=(8, 8))
         self.ax.set_xlim(0, 10)
         self.ax.set_ylim(0, 10)
@@ -18,10 +538,23 @@ class PointLocator:
         self.original_rect = Rectangle((0, 0), 10, 10, fill=False, edgecolor='blue', lw=2)
         self.ax.add_patch(self.original_rect)
         
+        # 可选：叠加显示一棵已有的点四叉树
+        if tree is not None:
+            draw_quadtree(self.ax, tree.root)
+            xy = tree.points(tree.ids())
+            self.ax.plot(xy[:, 0], xy[:, 1], 'k.', markersize=2)
+        
+        # 可选：显示用于提前停止的区域边界
+        for polygon in regions or []:
+            self.ax.add_patch(Polygon(polygon, fill=False, edgecolor='green', lw=2))
+        
+        self.engine = QuadrantLocator(bounds=(0, 10, 0, 10), min_size=precision, regions=regions)
+        self.animate = animate  # 是否逐层回放定位过程
+        self.result = None
         self.target_point = None
         self.current_bounds = [0, 10, 0, 10]  # [xmin, xmax, ymin, ymax]
-        self.fill_params = []  # 存储填充区域的参数
-        self.lines = []  # 存储所有绘制的线条
+        self.fills = None  # 回放用的填充集合
+        self.grid_lines = None  # 回放用的田字格线段集合
         self.iteration_count = 0  # 跟踪迭代次数
         self.fig.canvas.mpl_connect('button_press_event', self.on_click)
         plt.show()
@@ -40,84 +573,31 @@ class PointLocator:
             self.locate_point()
     
     def locate_point(self):
-        xmin, xmax, ymin, ymax = self.current_bounds
-        width = xmax - xmin
-        height = ymax - ymin
+        """用定位引擎计算目标点的全部细分步骤，再逐层回放"""
+        self.result = self.engine.locate([self.target_point], record=True)
+        history = self.result.history[:self.result.levels[0], 0]
         
-        # 终止条件：区域小于0.1单位
-        if width < 0.1 or height < 0.1:
-            self.show_result()
-            return
+        # 整个回放只用一个填充集合和一个线段集合，每层只更新数据
+        self.fills = PolyCollection([], alpha=0.3, edgecolors='none')
+        self.grid_lines = LineCollection([], colors='blue', alpha=0.7)
+        self.ax.add_collection(self.fills)
+        self.ax.add_collection(self.grid_lines)
         
-        # 计算中点
-        mid_x = (xmin + xmax) / 2
-        mid_y = (ymin + ymax) / 2
-        
-        # 为当前搜索区域添加彩色填充
-        self.iteration_count += 1
-        
-        # 使用HSV颜色空间，根据迭代次数改变色相
-        hue = (self.iteration_count * 30) % 360  # 每步旋转30度
-        saturation = 0.6
-        value = 0.9 - min(0.3, self.iteration_count * 0.03)  # 随着迭代次数增加，亮度略微降低
-        
-        # 将HSV转换为RGB
-        r, g, b = colorsys.hsv_to_rgb(hue/360, saturation, value)
-        color = (r, g, b)
-        
-        # 保存填充参数（不创建实际对象）
-        fill_params = {
-            'xy': (xmin, ymin),
-            'width': width,
-            'height': height,
-            'facecolor': color,
-            'alpha': 0.3
-        }
-        self.fill_params.append(fill_params)
-        
-        # 创建并添加填充矩形到当前图形
-        fill_patch = Rectangle((xmin, ymin), width, height, 
-                              facecolor=color, alpha=0.3, edgecolor='none')
-        self.ax.add_patch(fill_patch)
-        
-        # 绘制田字格并保存线条参数
-        # 水平线（从当前左边界到右边界，高度为mid_y）
-        hline, = self.ax.plot([xmin, xmax], [mid_y, mid_y], color='blue', alpha=0.7)
-        # 垂直线（从当前下边界到上边界，位置为mid_x）
-        vline, = self.ax.plot([mid_x, mid_x], [ymin, ymax], color='blue', alpha=0.7)
-        
-        # 保存线条参数
-        self.lines.append({
-            'points': [(xmin, mid_y), (xmax, mid_y)],
-            'color': hline.get_color(),
-            'alpha': hline.get_alpha(),
-            'linewidth': hline.get_linewidth()
-        })
-        self.lines.append({
-            'points': [(mid_x, ymin), (mid_x, ymax)],
-            'color': vline.get_color(),
-            'alpha': vline.get_alpha(),
-            'linewidth': vline.get_linewidth()
-        })
+        for level in range(1, len(history) + 1):
+            self.draw_step(history[:level])
+            if self.animate:
+                plt.pause(0.5)  # 暂停以便观察
         
+        self.current_bounds = self.result.cells[0].tolist()
+        self.show_result()
+    
+    def draw_step(self, cells):
+        """绘制前若干层细分：各层搜索区域的彩色填充和田字格"""
+        self.iteration_count = len(cells)
+        self.fills.set_verts(_cell_polygons(cells))
+        self.fills.set_facecolor(_step_colors(range(1, len(cells) + 1)))
+        self.grid_lines.set_segments(_cell_crosses(cells))
         plt.draw()
-        
-        # 确定点在哪个象限
-        tx, ty = self.target_point
-        if tx <= mid_x:
-            if ty <= mid_y:
-                self.current_bounds = [xmin, mid_x, ymin, mid_y]
-            else:
-                self.current_bounds = [xmin, mid_x, mid_y, ymax]
-        else:
-            if ty <= mid_y:
-                self.current_bounds = [mid_x, xmax, ymin, mid_y]
-            else:
-                self.current_bounds = [mid_x, xmax, mid_y, ymax]
-        
-        # 递归细分
-        plt.pause(0.5)  # 暂停以便观察
-        self.locate_point()
     
     def show_result(self):
         x, y = self.target_point
@@ -138,29 +618,18 @@ class PointLocator:
                       fontsize=12, ha='center', 
                       bbox=dict(facecolor='white', alpha=0.8))
         
-        # 重新创建所有填充区域
-        for params in self.fill_params:
-            rect = Rectangle(params['xy'], params['width'], params['height'],
-                            facecolor=params['facecolor'], alpha=params['alpha'],
-                            edgecolor='none')
-            result_ax.add_patch(rect)
-        
-        # 重新绘制田字格线条
-        for line_params in self.lines:
-            points = line_params['points']
-            xdata = [p[0] for p in points]
-            ydata = [p[1] for p in points]
-            result_ax.plot(xdata, ydata, 
-                          color=line_params['color'],
-                          alpha=line_params['alpha'],
-                          linewidth=line_params['linewidth'])
+        # 一次性绘制全部填充区域和田字格线条
+        draw_subdivision(result_ax, self.result.history[:self.result.levels[0]])
         
         # 重新绘制原正方形
         result_ax.add_patch(Rectangle((0, 0), 10, 10, 
                                     fill=False, edgecolor='blue', lw=1))
         
         # 添加图例说明
-        result_ax.text(0.1, 9.9, f'Return Times: {self.iteration_count}', 
+        legend = f'Return Times: {self.iteration_count}\nKey: {self.result.keys()[0]}'
+        if self.result.regions is not None:
+            legend += f'\nRegion: {self.result.regions[0]}'
+        result_ax.text(0.1, 9.9, legend, 
                       fontsize=12, va='top', ha='left',
                       bbox=dict(facecolor='white', alpha=0.8))
         
@@ -1,9 +1,480 @@
 import tkinter as tk
-import random
 import math
 import time
+import threading
+import queue
+import os
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from tkinter import messagebox, ttk
 
+MC_BROADCAST_BUDGET = 1 << 18  # 广播判断时每块（采样点数 × 边数）的元素上限
+POLYGON_INDEX_MAX_SLABS = 4096  # 多边形索引的最大条带数
+POLYGON_INDEX_CHUNK = 1 << 16  # 索引查询时每块的采样点数
+POLYGON_INDEX_MIN_EDGES = 16  # 边数不超过此值时直接广播比较更快
+MC_BATCH_SIZE = 50000  # 后台估计时每批的最少采样点数
+MC_MAX_BATCHES = 64  # 采样总数很大时最多切成的批数
+MC_PARALLEL_MIN_SAMPLES = 1000000  # 采样点数达到此值才使用多进程
+MC_CACHE_MAX_SAMPLES = 200000  # 拖动时缓存的采样点数上限
+MODEL_RESYNC_MOVES = 1000  # 增量更新多少次后完整重算一次面积和周长
+MC_CONFIDENCE_Z = 1.96  # 95% 置信区间
+SPAN_BANDS = 128  # 重要性抽样时扫描线条带的数量
+SOBOL_BITS = 32  # Sobol 序列的位数
+
+# 采样方式及其显示名称
+SAMPLING_MODES = {
+    "uniform": "均匀随机",
+    "stratified": "分层抽样",
+    "halton": "Halton 序列",
+    "sobol": "Sobol 序列",
+    "importance": "扫描线重要性抽样",
+}
+
+def points_in_polygon(xs, ys, polygon):
+    """向量化射线法：把所有采样点与多边形所有边广播比较，返回布尔数组
+    
+    射线法规则：边跨过 y（下端开、上端闭）且交点不在点的左侧时计一次穿越，
+    穿越次数为奇数即在内部。
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    vertices = np.asarray(polygon, dtype=float)
+    x1, y1 = vertices[:, 0], vertices[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    
+    # 水平边永远不会被穿越，先去掉以免除零；边排成列向量，与采样点广播成（边数 × 点数）
+    keep = y1 != y2
+    x1, y1, x2, y2 = (v[keep, None] for v in (x1, y1, x2, y2))
+    dx, dy = x2 - x1, y2 - y1
+    
+    inside = np.zeros(len(xs), dtype=bool)
+    chunk = max(1, MC_BROADCAST_BUDGET // max(1, len(x1)))
+    for start in range(0, len(xs), chunk):
+        x = xs[start:start + chunk]
+        y = ys[start:start + chunk]
+        crosses = (y1 < y) != (y2 < y)
+        crosses &= x <= (y - y1) * dx / dy + x1
+        # 沿边的方向异或即穿越次数的奇偶
+        inside[start:start + chunk] = np.bitwise_xor.reduce(crosses, axis=0)
+    return inside
+
+class PolygonIndex:
+    """按水平条带分桶的多边形边索引，每个图形只建一次
+    
+    把包围盒在 y 方向等分成若干条带，每条边登记到它跨过的所有条带中，
+    查询时每个点只与所在条带里的边做穿越测试（规则同 points_in_polygon）。
+    """
+    def __init__(self, polygon, num_slabs=None):
+        vertices = np.asarray(polygon, dtype=float)
+        self.vertices = vertices
+        x1, y1 = vertices[:, 0], vertices[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        keep = y1 != y2
+        self.x1, self.y1, self.y2 = x1[keep], y1[keep], y2[keep]
+        self.dx, self.dy = x2[keep] - self.x1, self.y2 - self.y1
+        
+        self.min_y, self.max_y = vertices[:, 1].min(), vertices[:, 1].max()
+        if num_slabs is None:
+            num_slabs = min(max(1, len(self.x1)), POLYGON_INDEX_MAX_SLABS)
+        self.num_slabs = num_slabs
+        self.slab_height = (self.max_y - self.min_y) / num_slabs or 1.0
+        
+        # 每条边覆盖的条带区间 [lo, hi]，展开成 (条带, 边) 对后按条带排序（CSR 形式）
+        lo = self.slab_of(np.minimum(self.y1, self.y2))
+        hi = self.slab_of(np.maximum(self.y1, self.y2))
+        spans = hi - lo + 1
+        edge_ids = np.repeat(np.arange(len(self.x1)), spans)
+        slabs = np.repeat(lo, spans) + (np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans))
+        order = np.argsort(slabs, kind='stable')
+        self.edge_ids = edge_ids[order]
+        # 按条带顺序复制一份边参数，查询时省去一次间接寻址
+        self.pair_x1, self.pair_y1, self.pair_y2, self.pair_dx, self.pair_dy = (
+            v[self.edge_ids] for v in (self.x1, self.y1, self.y2, self.dx, self.dy))
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(slabs, minlength=num_slabs))])
+    
+    def slab_of(self, ys):
+        """y 坐标所在的条带编号"""
+        slabs = np.floor((np.asarray(ys, dtype=float) - self.min_y) / self.slab_height)
+        return np.clip(slabs, 0, self.num_slabs - 1).astype(np.int64)
+    
+    def contains(self, xs, ys):
+        """判断一批点是否在多边形内，返回布尔数组"""
+        if len(self.x1) <= POLYGON_INDEX_MIN_EDGES:
+            return points_in_polygon(xs, ys, self.vertices)
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        inside = np.zeros(len(xs), dtype=bool)
+        for start in range(0, len(xs), POLYGON_INDEX_CHUNK):
+            x = xs[start:start + POLYGON_INDEX_CHUNK]
+            y = ys[start:start + POLYGON_INDEX_CHUNK]
+            slab = self.slab_of(y)
+            first = self.offsets[slab]
+            counts = self.offsets[slab + 1] - first
+            
+            # 展开成 (点, 所在条带中的边) 对：每个点重复 counts 次，依次对应条带中的各条边
+            starts = np.cumsum(counts) - counts
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            pair = np.arange(total) + np.repeat(first - starts, counts)
+            px, py = np.repeat(x, counts), np.repeat(y, counts)
+            
+            crosses = (self.pair_y1[pair] < py) != (self.pair_y2[pair] < py)
+            crosses &= px <= (py - self.pair_y1[pair]) * self.pair_dx[pair] / self.pair_dy[pair] + self.pair_x1[pair]
+            # 每个点的穿越次数奇偶；条带中没有边的点在多边形外
+            parity = np.bitwise_xor.reduceat(crosses, np.minimum(starts, total - 1))
+            inside[start:start + POLYGON_INDEX_CHUNK] = parity & (counts > 0)
+        return inside
+
+def polygon_bounds(polygon):
+    """多边形的边界框 (min_x, max_x, min_y, max_y)"""
+    vertices = np.asarray(polygon, dtype=float)
+    min_x, min_y = vertices.min(axis=0)
+    max_x, max_y = vertices.max(axis=0)
+    return min_x, max_x, min_y, max_y
+
+def scanline_spans(polygon, num_bands=SPAN_BANDS):
+    """把边界框沿 y 等分成若干条带，求多边形在每条带内占据的 x 范围
+    
+    返回 (y0, height, xlo, xhi)，条带 i 为 [xlo[i], xhi[i]] x [y0[i], y0[i] + height]，
+    与多边形不相交的条带宽度为 0。
+    """
+    vertices = np.asarray(polygon, dtype=float)
+    xa, ya = vertices[:, 0], vertices[:, 1]
+    xb, yb = np.roll(xa, -1), np.roll(ya, -1)
+    min_y, max_y = ya.min(), ya.max()
+    height = (max_y - min_y) / num_bands or 1.0
+    
+    # 展开成 (边, 条带) 对，把每条边裁剪到条带内再取 x 范围
+    lo = np.clip(np.floor((np.minimum(ya, yb) - min_y) / height), 0, num_bands - 1).astype(np.int64)
+    hi = np.clip(np.floor((np.maximum(ya, yb) - min_y) / height), 0, num_bands - 1).astype(np.int64)
+    spans = hi - lo + 1
+    edge = np.repeat(np.arange(len(xa)), spans)
+    band = np.repeat(lo, spans) + (np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans))
+    
+    band_y0 = min_y + band * height
+    y_low = np.maximum(np.minimum(ya, yb)[edge], band_y0)
+    y_high = np.minimum(np.maximum(ya, yb)[edge], band_y0 + height)
+    dy = (yb - ya)[edge]
+    flat = dy == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_low = np.where(flat, xa[edge], xa[edge] + (y_low - ya[edge]) * (xb - xa)[edge] / dy)
+        x_high = np.where(flat, xb[edge], xa[edge] + (y_high - ya[edge]) * (xb - xa)[edge] / dy)
+    
+    xlo = np.full(num_bands, np.inf)
+    xhi = np.full(num_bands, -np.inf)
+    np.minimum.at(xlo, band, np.minimum(x_low, x_high))
+    np.maximum.at(xhi, band, np.maximum(x_low, x_high))
+    empty = xlo > xhi
+    xlo[empty] = xhi[empty] = 0.0
+    return min_y + np.arange(num_bands) * height, height, xlo, xhi
+
+def radical_inverse(indices, base):
+    """van der Corput 逆序：把整数的 base 进制各位倒到小数点后"""
+    indices = np.asarray(indices, dtype=np.int64).copy()
+    result = np.zeros(len(indices))
+    scale = 1.0 / base
+    while indices.any():
+        result += (indices % base) * scale
+        indices //= base
+        scale /= base
+    return result
+
+def halton_points(start, count):
+    """Halton 序列（底数 2、3）中下标 [start, start + count) 的点"""
+    indices = np.arange(start, start + count)
+    return radical_inverse(indices, 2), radical_inverse(indices, 3)
+
+def _sobol_directions():
+    """二维 Sobol 序列的方向数：第一维为 v_k = 2^-k，第二维由本原多项式 x + 1 生成"""
+    first = [1 << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+    second = []
+    m = 1
+    for k in range(SOBOL_BITS):
+        second.append(m << (SOBOL_BITS - 1 - k))
+        m = (m << 1) ^ m
+    return np.array(first, dtype=np.uint64), np.array(second, dtype=np.uint64)
+
+SOBOL_DIRECTIONS = _sobol_directions()
+
+def sobol_points(start, count, shift=(0, 0)):
+    """二维 Sobol 序列中下标 [start, start + count) 的点，可叠加一个随机数字移位（按位异或）"""
+    indices = np.arange(start, start + count, dtype=np.uint64)
+    coords = []
+    for directions, digital_shift in zip(SOBOL_DIRECTIONS, shift):
+        value = np.full(count, digital_shift, dtype=np.uint64)
+        for k in range(SOBOL_BITS):
+            bit = (indices >> np.uint64(k)) & np.uint64(1)
+            value ^= bit * directions[k]
+        coords.append(value / float(1 << SOBOL_BITS))
+    return coords[0], coords[1]
+
+class AreaSampler:
+    """按指定方式在采样区域内生成点，估计值 = 区域面积 × 内部点比例
+    
+    所有方式生成的点在采样区域内的边缘分布都是均匀的：
+    uniform / stratified / halton / sobol 的区域为边界框，
+    importance 的区域为各扫描线条带内多边形的 x 范围拼成的阶梯形，不在图形附近浪费采样。
+    低差异序列按 seed 做随机平移（Halton）或数字移位（Sobol），
+    每批接着上一批的序列下标继续。
+    """
+    def __init__(self, polygon, mode="uniform", seed=0):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"未知的采样方式: {mode}")
+        self.mode = mode
+        self.bounds = polygon_bounds(polygon)
+        min_x, max_x, min_y, max_y = self.bounds
+        self.area = (max_x - min_x) * (max_y - min_y)
+        
+        shift_rng = np.random.default_rng(np.random.SeedSequence(seed))
+        self.shift = shift_rng.random(2)
+        self.digital_shift = tuple(int(v) for v in shift_rng.integers(0, 1 << SOBOL_BITS, 2))
+        
+        if mode == "importance":
+            self.band_y0, self.band_height, self.band_xlo, self.band_xhi = scanline_spans(polygon)
+            band_areas = (self.band_xhi - self.band_xlo) * self.band_height
+            self.area = band_areas.sum()
+            self.band_p = band_areas / self.area if self.area > 0 else None
+    
+    def sample(self, rng, start, count):
+        """生成序列中第 [start, start + count) 个采样点，返回 (xs, ys)"""
+        min_x, max_x, min_y, max_y = self.bounds
+        if self.mode == "importance":
+            if self.band_p is None:
+                return np.empty(0), np.empty(0)
+            band = rng.choice(len(self.band_p), size=count, p=self.band_p)
+            u, v = rng.random(count), rng.random(count)
+            xs = self.band_xlo[band] + u * (self.band_xhi[band] - self.band_xlo[band])
+            ys = self.band_y0[band] + v * self.band_height
+            return xs, ys
+        
+        if self.mode == "stratified":
+            # 每批划分为 k × k 个格子，每格抖动采一点，剩下的点均匀采样
+            k = math.isqrt(count)
+            cells = np.arange(k * k)
+            u = np.concatenate([(cells % k + rng.random(k * k)) / k, rng.random(count - k * k)])
+            v = np.concatenate([(cells // k + rng.random(k * k)) / k, rng.random(count - k * k)])
+        elif self.mode == "halton":
+            u, v = halton_points(start, count)
+            u, v = (u + self.shift[0]) % 1.0, (v + self.shift[1]) % 1.0
+        elif self.mode == "sobol":
+            u, v = sobol_points(start, count, self.digital_shift)
+        else:
+            u, v = rng.random(count), rng.random(count)
+        return min_x + u * (max_x - min_x), min_y + v * (max_y - min_y)
+
+def estimate_batch(sampler, index, start, batch_size, seed, batch_number):
+    """用第 batch_number 个独立随机流生成一批采样点，返回内部点数
+    
+    随机流由 (seed, batch_number) 决定，同一种子下每批结果可复现。
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(batch_number,)))
+    xs, ys = sampler.sample(rng, start, batch_size)
+    return int(np.count_nonzero(index.contains(xs, ys)))
+
+def batch_plan(num_samples):
+    """把采样总数切成固定的批次 [(起始下标, 批大小, 批号), ...]
+    
+    切分只取决于采样总数，与进程数无关，因此同一种子的结果总是相同。
+    """
+    batch_size = max(MC_BATCH_SIZE, -(-num_samples // MC_MAX_BATCHES))
+    return [(start, min(batch_size, num_samples - start), number)
+            for number, start in enumerate(range(0, num_samples, batch_size))]
+
+def run_batches(sampler, index, num_samples, seed, executor=None, workers=1, cancelled=None):
+    """按批号顺序逐批产出 (批大小, 内部点数)
+    
+    给出进程池时各批在子进程中计算，始终保持 2 × workers 批在途，
+    结果仍按批号顺序合并；cancelled 被设置后不再提交新批并撤销未开始的批。
+    """
+    plan = batch_plan(num_samples)
+    if executor is None:
+        for start, batch_size, number in plan:
+            if cancelled is not None and cancelled.is_set():
+                return
+            yield batch_size, estimate_batch(sampler, index, start, batch_size, seed, number)
+        return
+    
+    pending = deque()
+    plan = iter(plan)
+    try:
+        while True:
+            while len(pending) < 2 * workers and not (cancelled is not None and cancelled.is_set()):
+                batch = next(plan, None)
+                if batch is None:
+                    break
+                start, batch_size, number = batch
+                pending.append((batch_size, executor.submit(
+                    estimate_batch, sampler, index, start, batch_size, seed, number)))
+            if not pending or (cancelled is not None and cancelled.is_set()):
+                return
+            batch_size, future = pending.popleft()
+            yield batch_size, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+def parallel_monte_carlo(polygon, num_samples, mode="uniform", seed=0, workers=None):
+    """用进程池估计面积，返回 (估计面积, 内部点数, 采样区域面积)
+    
+    每批使用由 (seed, 批号) 决定的独立随机流，结果与进程数无关、可复现。
+    """
+    workers = workers or os.cpu_count() or 1
+    index = PolygonIndex(polygon)
+    sampler = AreaSampler(polygon, mode, seed)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        inside = sum(count for _, count in run_batches(sampler, index, num_samples, seed, executor, workers))
+    return inside / num_samples * sampler.area, inside, sampler.area
+
+def area_confidence_interval(points_inside, num_samples, domain_area, z=MC_CONFIDENCE_Z):
+    """按二项分布的正态近似，返回面积估计置信区间的半宽
+    
+    对分层抽样和低差异序列这是偏保守的区间。
+    """
+    p = points_inside / num_samples
+    return z * math.sqrt(p * (1 - p) / num_samples) * domain_area
+
+def compare_sampling_modes(polygon, num_samples, exact_area, seed=0, index=None):
+    """用同样的采样点数依次运行各采样方式
+    
+    返回 [(方式, 估计面积, 相对扫描线面积 exact_area 的误差 %, 耗时秒), ...]
+    """
+    index = PolygonIndex(polygon) if index is None else index
+    results = []
+    for mode in SAMPLING_MODES:
+        start = time.perf_counter()
+        sampler = AreaSampler(polygon, mode, seed)
+        inside = sum(count for _, count in run_batches(sampler, index, num_samples, seed))
+        estimate = inside / num_samples * sampler.area
+        error = abs(estimate - exact_area) / exact_area * 100 if exact_area > 0 else 0
+        results.append((mode, estimate, error, time.perf_counter() - start))
+    return results
+
+class MonteCarloJob(threading.Thread):
+    """在后台线程中分批估计面积（可选地把各批分给进程池）
+    
+    每批结束后以 (已采样数, 内部点数, 采样区域面积, 耗时) 调用 on_progress；
+    某一批出错（如进程池崩溃）时以异常对象调用 on_error；
+    cancel() 之后不再开始新的一批，也不再回调。
+    """
+    def __init__(self, index, sampler, num_samples, seed, on_progress, executor=None, workers=1,
+                 on_error=None):
+        super().__init__()
+        self.daemon = True  # 设置为守护线程，主线程退出时自动结束
+        self.index = index
+        self.sampler = sampler
+        self.num_samples = num_samples
+        self.seed = seed
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.executor = executor
+        self.workers = workers
+        self.cancelled = threading.Event()
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    def run(self):
+        start = time.perf_counter()
+        done = inside = 0
+        try:
+            for batch_size, batch_inside in run_batches(self.sampler, self.index, self.num_samples, self.seed,
+                                                        self.executor, self.workers, self.cancelled):
+                done += batch_size
+                inside += batch_inside
+                if self.cancelled.is_set():
+                    return
+                self.on_progress(done, inside, self.sampler.area, time.perf_counter() - start)
+        except Exception as e:
+            if not self.cancelled.is_set() and self.on_error is not None:
+                self.on_error(e)
+
+class PolygonModel:
+    """多边形几何模型：维护鞋带公式的累加和与周长，移动一个顶点时只更新相邻两条边
+    
+    points 与调用方共享同一个列表。为避免浮点误差累积，每移动 MODEL_RESYNC_MOVES 次完整重算一次。
+    """
+    def __init__(self, points):
+        self.points = points
+        self.recompute()
+    
+    def _edge(self, i):
+        """第 i 条边（顶点 i 到 i+1）对鞋带和与周长的贡献"""
+        x1, y1 = self.points[i]
+        x2, y2 = self.points[(i + 1) % len(self.points)]
+        return x1 * y2 - x2 * y1, math.hypot(x2 - x1, y2 - y1)
+    
+    def recompute(self):
+        """完整重算鞋带和与周长，O(n)"""
+        self.cross_sum = 0.0
+        self.perimeter = 0.0
+        self.moves = 0
+        for i in range(len(self.points)):
+            cross, length = self._edge(i)
+            self.cross_sum += cross
+            self.perimeter += length
+    
+    def move_vertex(self, i, x, y):
+        """把顶点 i 移到 (x, y)，O(1) 更新面积和周长"""
+        edges = ((i - 1) % len(self.points), i)
+        for edge in edges:
+            cross, length = self._edge(edge)
+            self.cross_sum -= cross
+            self.perimeter -= length
+        self.points[i] = (x, y)
+        for edge in edges:
+            cross, length = self._edge(edge)
+            self.cross_sum += cross
+            self.perimeter += length
+        
+        self.moves += 1
+        if self.moves >= MODEL_RESYNC_MOVES:
+            self.recompute()
+    
+    @property
+    def area(self):
+        return abs(self.cross_sum) / 2.0
+
+class MonteCarloCache:
+    """固定一组均匀采样点并缓存它们的内外判定
+    
+    把顶点 old 移到 new 时，只有落在闭合路径 prev -> old -> next -> new 内（奇偶规则）的点
+    内外状态会翻转，所以只需重判这块区域包围盒内的点；采样点按 y 排序，用二分查找截取。
+    """
+    def __init__(self, index, domain, num_samples, seed):
+        rng = np.random.default_rng(seed)
+        min_x, max_x, min_y, max_y = domain
+        self.domain = domain
+        self.area = (max_x - min_x) * (max_y - min_y)
+        self.num_samples = num_samples
+        self.xs = rng.uniform(min_x, max_x, num_samples)
+        self.ys = np.sort(rng.uniform(min_y, max_y, num_samples))
+        self.inside = index.contains(self.xs, self.ys)
+        self.points_inside = int(np.count_nonzero(self.inside))
+    
+    def covers(self, x, y):
+        """点是否在采样区域内（顶点移出区域后缓存需要重建）"""
+        min_x, max_x, min_y, max_y = self.domain
+        return min_x <= x <= max_x and min_y <= y <= max_y
+    
+    def move_vertex(self, prev, old, next_point, new):
+        """顶点 old 移到 new 后更新缓存，返回重判的采样点数"""
+        region = np.array([prev, old, next_point, new], dtype=float)
+        (min_x, min_y), (max_x, max_y) = region.min(axis=0), region.max(axis=0)
+        lo = np.searchsorted(self.ys, min_y, side='left')
+        hi = np.searchsorted(self.ys, max_y, side='right')
+        xs = self.xs[lo:hi]
+        candidates = lo + np.flatnonzero((xs >= min_x) & (xs <= max_x))
+        
+        flipped = candidates[points_in_polygon(self.xs[candidates], self.ys[candidates], region)]
+        self.points_inside += len(flipped) - 2 * int(np.count_nonzero(self.inside[flipped]))
+        self.inside[flipped] = ~self.inside[flipped]
+        return len(candidates)
+    
+    def estimate(self):
+        return self.points_inside / self.num_samples * self.area
+
 class MonteCarloAreaEstimator:
     def __init__(self, root):
         self.root = root
@@ -125,13 +596,37 @@ class MonteCarloAreaEstimator:
         
         tk.Label(points_frame, text="蒙特卡洛采样点数:").pack(side=tk.LEFT)
         self.points_var = tk.IntVar(value=10000)
-        points_slider = ttk.Scale(points_frame, from_=1000, to=50000, orient=tk.HORIZONTAL, 
+        points_slider = ttk.Scale(points_frame, from_=1000, to=2000000, orient=tk.HORIZONTAL, 
                                  variable=self.points_var, command=self.update_points_label)
         points_slider.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
         
         self.points_value_label = tk.Label(points_frame, text="10000")
         self.points_value_label.pack(side=tk.RIGHT)
         
+        # 采样方式选择
+        sampling_frame = tk.Frame(control_frame)
+        sampling_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        tk.Label(sampling_frame, text="采样方式:").pack(side=tk.LEFT)
+        self.sampling_var = tk.StringVar(value=SAMPLING_MODES["uniform"])
+        sampling_box = ttk.Combobox(sampling_frame, textvariable=self.sampling_var, state="readonly",
+                                    values=list(SAMPLING_MODES.values()))
+        sampling_box.pack(side=tk.LEFT, padx=(5, 0))
+        sampling_box.bind("<<ComboboxSelected>>", lambda event: self.update_properties())
+        
+        # 并行进程数与随机种子（种子留空则每次随机）
+        parallel_frame = tk.Frame(control_frame)
+        parallel_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        tk.Label(parallel_frame, text="进程数:").pack(side=tk.LEFT)
+        self.workers_var = tk.IntVar(value=1)
+        tk.Spinbox(parallel_frame, from_=1, to=os.cpu_count() or 1, width=4,
+                   textvariable=self.workers_var).pack(side=tk.LEFT, padx=(5, 10))
+        
+        tk.Label(parallel_frame, text="随机种子:").pack(side=tk.LEFT)
+        self.seed_var = tk.StringVar(value="")
+        tk.Entry(parallel_frame, textvariable=self.seed_var, width=12).pack(side=tk.LEFT, padx=(5, 0))
+        
         # 按钮区域
         button_frame = tk.Frame(control_frame)
         button_frame.pack(fill=tk.X)
@@ -145,6 +640,9 @@ class MonteCarloAreaEstimator:
         self.estimate_btn = tk.Button(button_frame, text="计算几何属性", command=self.estimate_properties)
         self.estimate_btn.pack(side=tk.LEFT, padx=5)
         
+        self.compare_btn = tk.Button(button_frame, text="比较采样方式", command=self.compare_sampling)
+        self.compare_btn.pack(side=tk.LEFT, padx=5)
+        
         # 绑定鼠标事件
         self.canvas.bind("<ButtonPress-1>", self.on_canvas_click)
         self.canvas.bind("<B1-Motion>", self.draw)
@@ -159,7 +657,37 @@ class MonteCarloAreaEstimator:
         self.lines = []  # 存储线段的句柄
         self.dragging_point = None  # 当前拖动的点索引
         self.drag_start_pos = None  # 拖动开始的位置
+        self.rng = np.random.default_rng()  # 蒙特卡洛采样用的随机数生成器
+        self.polygon_index = None  # 当前图形的边索引，图形改变时置空
+        self.model = None  # 封闭图形的几何模型（增量维护面积和周长）
+        self.mc_cache = None  # 拖动顶点时使用的采样点缓存
+        self.mc_job = None  # 正在运行的后台蒙特卡洛估计
+        self.executor = None  # 多进程估计用的进程池，按需创建
+        self.executor_workers = 0
+        self.exact_area = 0.0
+        self.scanline_time = 0.0
         
+        # 用于线程安全的GUI更新队列
+        self.gui_queue = queue.Queue()
+        self.process_gui_queue()
+        
+    def process_gui_queue(self):
+        """处理GUI更新队列"""
+        try:
+            while True:
+                task = self.gui_queue.get_nowait()
+                if callable(task):
+                    task()
+        except queue.Empty:
+            pass
+        finally:
+            # 每50毫秒检查一次队列，让估计值平滑地收敛
+            self.root.after(50, self.process_gui_queue)
+    
+    def safe_gui_call(self, func):
+        """安全地调用GUI函数（通过队列）"""
+        self.gui_queue.put(func)
+    
     def update_points_label(self, value):
         """更新采样点数标签"""
         self.points_value_label.config(text=str(int(float(value))))
@@ -198,14 +726,15 @@ class MonteCarloAreaEstimator:
         
         if mode == "freehand":
             self.start_draw(event)
-        elif mode == "pointwise" and not self.closed_shape:
-            # 检查是否点击了现有的点
+        elif mode == "pointwise":
+            # 检查是否点击了现有的点（封闭后仍可拖动顶点）；
+            # 只有逐点创建的顶点有点标记，自由绘制的图形不能拖动
             clicked_point = self.find_point_at(event.x, event.y)
-            if clicked_point is not None:
+            if clicked_point is not None and clicked_point < len(self.point_handles):
                 # 开始拖动点
                 self.dragging_point = clicked_point
                 self.drag_start_pos = (event.x, event.y)
-            else:
+            elif not self.closed_shape:
                 # 添加新点
                 self.add_point(event.x, event.y)
             
@@ -222,6 +751,9 @@ class MonteCarloAreaEstimator:
         if not self.closed_shape:
             self.drawing = True
             self.points = [(event.x, event.y)]
+            self.polygon_index = None
+            self.model = None
+            self.mc_cache = None
             # 清除之前的填充
             if self.shape_id:
                 self.canvas.delete(self.shape_id)
@@ -230,6 +762,7 @@ class MonteCarloAreaEstimator:
     def add_point(self, x, y):
         """在选点模式下添加一个点"""
         self.points.append((x, y))
+        self.polygon_index = None
         
         # 绘制点
         point_handle = self.canvas.create_oval(x-3, y-3, x+3, y+3, fill="red", outline="")
@@ -252,6 +785,7 @@ class MonteCarloAreaEstimator:
         elif self.mode_var.get() == "freehand" and self.drawing and not self.closed_shape:
             x, y = event.x, event.y
             self.points.append((x, y))
+            self.polygon_index = None
             
             # 绘制线段
             if len(self.points) > 1:
@@ -263,8 +797,13 @@ class MonteCarloAreaEstimator:
         if self.dragging_point is None:
             return
             
-        # 更新点位置
-        self.points[self.dragging_point] = (x, y)
+        # 更新点位置（封闭图形通过几何模型增量更新面积和周长）
+        old_point = self.points[self.dragging_point]
+        if self.closed_shape:
+            self.get_model().move_vertex(self.dragging_point, x, y)
+        else:
+            self.points[self.dragging_point] = (x, y)
+        self.polygon_index = None
         
         # 更新点可视化
         self.canvas.coords(self.point_handles[self.dragging_point], 
@@ -272,12 +811,16 @@ class MonteCarloAreaEstimator:
         
         # 更新连接线
         n = len(self.points)
-        if n > 1:
+        if n > 1 and self.lines:
             # 更新前一条线
             if self.dragging_point > 0:
                 prev_idx = self.dragging_point - 1
                 prev_x, prev_y = self.points[prev_idx]
                 self.canvas.coords(self.lines[prev_idx], prev_x, prev_y, x, y)
+            elif self.closed_shape:
+                # 第一个点的前一条线是首尾连接线
+                last_x, last_y = self.points[-1]
+                self.canvas.coords(self.lines[-1], last_x, last_y, x, y)
             
             # 更新后一条线
             if self.dragging_point < n - 1:
@@ -294,15 +837,17 @@ class MonteCarloAreaEstimator:
             self.canvas.coords(self.shape_id, 
                               [coord for point in self.points for coord in point])
         
-        # 实时更新几何属性
+        # 实时更新几何属性（只做增量计算）
         if self.closed_shape:
-            self.update_properties()
+            self.update_drag_properties(self.dragging_point, old_point)
     
     def end_draw(self, event):
         if self.dragging_point is not None:
-            # 结束拖动点
+            # 结束拖动点，松开后再做一次完整的后台估计
             self.dragging_point = None
             self.drag_start_pos = None
+            if self.closed_shape:
+                self.update_properties()
         elif self.mode_var.get() == "freehand" and self.drawing and not self.closed_shape and len(self.points) > 2:
             # 连接起点和终点形成封闭图形
             start_x, start_y = self.points[0]
@@ -348,8 +893,12 @@ class MonteCarloAreaEstimator:
             self.canvas.lower(self.shape_id)
             
     def clear_canvas(self):
+        self.cancel_estimation()
         self.canvas.delete("all")
         self.points = []
+        self.polygon_index = None
+        self.model = None
+        self.mc_cache = None
         self.drawing = False
         self.closed_shape = False
         self.shape_id = None
@@ -372,52 +921,31 @@ class MonteCarloAreaEstimator:
         
         self.comparison_label.config(text="请先创建并计算一个图形")
         
-    def is_point_in_polygon(self, x, y, polygon):
-        # 使用射线法判断点是否在多边形内部
-        n = len(polygon)
-        inside = False
-        p1x, p1y = polygon[0]
-        for i in range(n + 1):
-            p2x, p2y = polygon[i % n]
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y:
-                            xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        if p1x == p2x or x <= xinters:
-                            inside = not inside
-            p1x, p1y = p2x, p2y
-        return inside
+    def get_polygon_index(self):
+        """返回当前图形的边索引，只在图形改变后重建"""
+        if self.polygon_index is None:
+            self.polygon_index = PolygonIndex(self.points)
+        return self.polygon_index
     
-    def scanline_area(self, polygon):
-        """使用扫描线算法计算多边形面积"""
-        n = len(polygon)
-        if n < 3:
-            return 0.0
-            
-        # 使用鞋带公式（Shoelace formula）计算多边形面积
-        area = 0.0
-        for i in range(n):
-            j = (i + 1) % n
-            area += polygon[i][0] * polygon[j][1]
-            area -= polygon[j][0] * polygon[i][1]
-            
-        return abs(area) / 2.0
+    def get_model(self):
+        """返回当前图形的几何模型，顶点列表被替换后重建"""
+        if self.model is None or self.model.points is not self.points:
+            self.model = PolygonModel(self.points)
+        return self.model
     
-    def scanline_perimeter(self, polygon):
-        """使用扫描线算法计算多边形周长"""
-        n = len(polygon)
-        if n < 2:
-            return 0.0
-            
-        perimeter = 0.0
-        for i in range(n):
-            j = (i + 1) % n
-            dx = polygon[j][0] - polygon[i][0]
-            dy = polygon[j][1] - polygon[i][1]
-            perimeter += math.sqrt(dx*dx + dy*dy)
-            
-        return perimeter
+    def get_mc_cache(self):
+        """返回拖动时使用的采样点缓存，采样点数设置改变后重建
+        
+        采样区域取画布与图形边界框的并集，拖动顶点时通常不必重建。
+        """
+        num_samples = min(self.points_var.get(), MC_CACHE_MAX_SAMPLES)
+        if self.mc_cache is None or self.mc_cache.num_samples != num_samples:
+            min_x, max_x, min_y, max_y = polygon_bounds(self.points)
+            domain = (min(0, min_x), max(self.canvas.winfo_width(), max_x),
+                      min(0, min_y), max(self.canvas.winfo_height(), max_y))
+            self.mc_cache = MonteCarloCache(self.get_polygon_index(), domain, num_samples,
+                                            self.sampling_seed())
+        return self.mc_cache
     
     def update_properties(self):
         """更新几何属性显示（实时计算）"""
@@ -428,10 +956,32 @@ class MonteCarloAreaEstimator:
         num_points = self.points_var.get()
         
         # 使用扫描线算法计算精确面积和周长
-        scanline_start = time.time()
-        exact_area = self.scanline_area(self.points)
-        exact_perimeter = self.scanline_perimeter(self.points)
-        scanline_time = time.time() - scanline_start
+        self.show_exact_properties()
+        
+        # 蒙特卡洛方法在后台分批估计，图形再次改变时立即取消
+        self.cancel_estimation()
+        self.montecarlo_area_label.config(text="计算中...")
+        seed = self.sampling_seed()
+        sampler = AreaSampler(self.points, self.sampling_mode(), seed)
+        try:
+            workers = max(1, self.workers_var.get())
+        except tk.TclError:
+            workers = 1
+        executor = self.get_executor(workers) if workers > 1 and num_points >= MC_PARALLEL_MIN_SAMPLES else None
+        job = MonteCarloJob(self.get_polygon_index(), sampler, num_points, seed,
+                            lambda *progress: self.safe_gui_call(lambda: self.show_estimate(job, *progress)),
+                            executor, workers,
+                            lambda error: self.safe_gui_call(lambda: self.show_estimate_error(job, error)))
+        self.mc_job = job
+        job.start()
+    
+    def show_exact_properties(self):
+        """从几何模型读取精确面积和周长并显示（模型已建好时为 O(1)）"""
+        scanline_start = time.perf_counter()
+        model = self.get_model()
+        exact_area = model.area
+        exact_perimeter = model.perimeter
+        scanline_time = time.perf_counter() - scanline_start
         
         # 更新扫描线算法结果显示
         self.scanline_area_label.config(text=f"{exact_area:.2f} 像素²")
@@ -439,34 +989,96 @@ class MonteCarloAreaEstimator:
         self.scanline_vertices_label.config(text=str(len(self.points)))
         self.scanline_time_label.config(text=f"{scanline_time*1000:.2f} 毫秒")
         
-        # 获取边界框
-        x_coords = [p[0] for p in self.points]
-        y_coords = [p[1] for p in self.points]
-        min_x, max_x = min(x_coords), max(x_coords)
-        min_y, max_y = min(y_coords), max(y_coords)
-        bounding_area = (max_x - min_x) * (max_y - min_y)
-        
-        # 蒙特卡洛方法计算面积
-        mc_start = time.time()
-        points_inside = 0
-        for i in range(num_points):
-            x = random.uniform(min_x, max_x)
-            y = random.uniform(min_y, max_y)
-            
-            if self.is_point_in_polygon(x, y, self.points):
-                points_inside += 1
+        self.exact_area = exact_area
+        self.scanline_time = scanline_time
+    
+    def update_drag_properties(self, index, old_point):
+        """拖动顶点时的增量更新：面积周长 O(1)，蒙特卡洛只重判变化区域内的缓存采样点"""
+        self.cancel_estimation()
+        self.show_exact_properties()
         
-        # 计算估计面积
-        estimated_area = (points_inside / num_points) * bounding_area
-        mc_time = time.time() - mc_start
+        mc_start = time.perf_counter()
+        new_point = self.points[index]
+        cache = self.mc_cache
+        if cache is not None and cache.num_samples == min(self.points_var.get(), MC_CACHE_MAX_SAMPLES) \
+                and cache.covers(*new_point):
+            prev_point = self.points[index - 1]
+            next_point = self.points[(index + 1) % len(self.points)]
+            cache.move_vertex(prev_point, old_point, next_point, new_point)
+        else:
+            self.mc_cache = None
+            cache = self.get_mc_cache()
+        mc_time = time.perf_counter() - mc_start
+        
+        self.display_estimate("缓存采样", cache.num_samples, cache.num_samples,
+                              cache.points_inside, cache.area, mc_time)
+    
+    def sampling_seed(self):
+        """用户填写的随机种子；留空或无效时随机生成"""
+        try:
+            return int(self.seed_var.get())
+        except ValueError:
+            return int(self.rng.integers(2**63))
+    
+    def get_executor(self, workers):
+        """返回指定进程数的进程池，进程数改变时重建"""
+        if self.executor is None or self.executor_workers != workers:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            self.executor_workers = workers
+        return self.executor
+    
+    def cancel_estimation(self):
+        """取消正在运行的后台估计"""
+        if self.mc_job is not None:
+            self.mc_job.cancel()
+            self.mc_job = None
+    
+    def sampling_mode(self):
+        """当前选择的采样方式"""
+        for mode, name in SAMPLING_MODES.items():
+            if name == self.sampling_var.get():
+                return mode
+        return "uniform"
+    
+    def show_estimate(self, job, num_samples, points_inside, domain_area, mc_time):
+        """显示后台估计的最新结果（已被取消的估计直接忽略）"""
+        if job is not self.mc_job:
+            return
+        if num_samples >= job.num_samples:
+            self.mc_job = None
+        self.display_estimate(SAMPLING_MODES[job.sampler.mode], num_samples, job.num_samples,
+                              points_inside, domain_area, mc_time)
+    
+    def show_estimate_error(self, job, error):
+        """后台估计出错时显示错误信息，出错的进程池下次估计时重建"""
+        if job is not self.mc_job:
+            return
+        self.mc_job = None
+        if job.executor is not None and job.executor is self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.montecarlo_area_label.config(text=f"估计失败: {error}")
+    
+    def display_estimate(self, mode_name, num_samples, total_samples, points_inside, domain_area, mc_time):
+        """显示蒙特卡洛估计结果及与扫描线算法的比较"""
+        exact_area = self.exact_area
+        scanline_time = self.scanline_time
+        
+        # 计算估计面积及置信区间
+        estimated_area = points_inside / num_samples * domain_area
+        half_width = area_confidence_interval(points_inside, num_samples, domain_area)
+        finished = num_samples >= total_samples
         
         # 计算面积相对误差
         area_error_percent = abs(estimated_area - exact_area) / exact_area * 100 if exact_area > 0 else 0
         
         # 更新蒙特卡洛方法结果显示
-        self.montecarlo_area_label.config(text=f"{estimated_area:.2f} 像素²")
+        self.montecarlo_area_label.config(text=f"{estimated_area:.2f} ± {half_width:.2f} 像素²")
         self.montecarlo_error_label.config(text=f"{area_error_percent:.2f}%")
-        self.montecarlo_points_label.config(text=str(num_points))
+        self.montecarlo_points_label.config(
+            text=str(num_samples) if finished else f"{num_samples}/{total_samples}")
         self.montecarlo_inside_label.config(text=str(points_inside))
         self.montecarlo_time_label.config(text=f"{mc_time*1000:.2f} 毫秒")
         
@@ -474,15 +1086,58 @@ class MonteCarloAreaEstimator:
         comparison_text = (
             f"面积比较:\n"
             f"  扫描线算法: {exact_area:.2f} 像素²\n"
-            f"  蒙特卡洛方法: {estimated_area:.2f} 像素²\n"
+            f"  蒙特卡洛方法（{mode_name}）: {estimated_area:.2f} 像素²\n"
+            f"  95% 置信区间: [{estimated_area - half_width:.2f}, {estimated_area + half_width:.2f}]\n"
             f"  差异: {abs(estimated_area - exact_area):.2f} 像素²\n"
             f"  相对误差: {area_error_percent:.2f}%\n\n"
             f"时间比较:\n"
             f"  扫描线算法耗时: {scanline_time*1000:.2f} 毫秒\n"
-            f"  蒙特卡洛方法耗时: {mc_time*1000:.2f} 毫秒"
+            f"  蒙特卡洛方法耗时: {mc_time*1000:.2f} 毫秒" + ("" if finished else "（进行中）")
         )
         self.comparison_label.config(text=comparison_text)
     
+    def compare_sampling(self):
+        """在后台用相同的采样点数比较各采样方式的误差"""
+        if not self.closed_shape or len(self.points) < 3:
+            messagebox.showwarning("警告", "请先创建并完成一个封闭图形!")
+            return
+        
+        polygon = list(self.points)
+        num_points = self.points_var.get()
+        exact_area = self.get_model().area
+        index = self.get_polygon_index()
+        seed = self.sampling_seed()
+        self.comparison_label.config(text="正在比较各采样方式...")
+        
+        def run():
+            try:
+                results = compare_sampling_modes(polygon, num_points, exact_area, seed, index)
+            except Exception as e:
+                self.safe_gui_call(lambda error=e: self.show_sampling_error(polygon, error))
+                return
+            self.safe_gui_call(lambda: self.show_sampling_comparison(polygon, num_points, exact_area, results))
+        
+        thread = threading.Thread(target=run)
+        thread.daemon = True  # 设置为守护线程，主线程退出时自动结束
+        thread.start()
+    
+    def show_sampling_comparison(self, polygon, num_points, exact_area, results):
+        """显示各采样方式的比较结果（图形已改变时忽略）"""
+        if polygon != self.points:
+            return
+        lines = [f"采样方式比较（每种 {num_points} 个采样点）:",
+                 f"  扫描线算法: {exact_area:.2f} 像素²"]
+        for mode, estimate, error, seconds in results:
+            lines.append(f"  {SAMPLING_MODES[mode]}: {estimate:.2f} 像素², "
+                         f"误差 {error:.3f}%, {seconds*1000:.1f} 毫秒")
+        self.comparison_label.config(text="\n".join(lines))
+    
+    def show_sampling_error(self, polygon, error):
+        """采样方式比较出错时显示错误信息（图形已改变时忽略）"""
+        if polygon != self.points:
+            return
+        self.comparison_label.config(text=f"采样方式比较失败: {error}")
+    
     def estimate_properties(self):
         """计算几何属性（完整计算）"""
         if not self.closed_shape or len(self.points) < 3: